@@ -1,12 +1,10 @@
 import streamlit as st
 import asyncio
-import os
+from contextlib import closing
 from datetime import datetime
 from src.conversation_manager import ConversationManager
 from src.models import StudentProfile
-from src.career_database import CareerDatabase
-from src.career_matcher import CareerMatcher
-from src.llm_client import LLMClient
+from src import shared_resources
 
 # Configure page
 st.set_page_config(
@@ -92,19 +90,29 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_shared_services():
+    """Process-wide LLM client, career catalog and matcher, shared by all sessions"""
+    llm_client = shared_resources.get_llm_client()
+    # Probe connectivity off the render path; the sidebar reads the cached result
+    llm_client.start_health_check()
+    return (
+        llm_client,
+        shared_resources.get_career_database(),
+        shared_resources.get_career_matcher()
+    )
+
 def initialize_session_state():
     """Initialize session state variables"""
-    if 'conversation_manager' not in st.session_state:
-        st.session_state.conversation_manager = ConversationManager()
-    if 'career_db' not in st.session_state:
-        st.session_state.career_db = CareerDatabase()
+    llm_client, career_db, career_matcher = get_shared_services()
     if 'llm_client' not in st.session_state:
-        st.session_state.llm_client = LLMClient()
+        st.session_state.llm_client = llm_client
+    if 'career_db' not in st.session_state:
+        st.session_state.career_db = career_db
     if 'career_matcher' not in st.session_state:
-        st.session_state.career_matcher = CareerMatcher(
-            st.session_state.career_db, 
-            st.session_state.llm_client
-        )
+        st.session_state.career_matcher = career_matcher
+    if 'conversation_manager' not in st.session_state:
+        st.session_state.conversation_manager = ConversationManager(llm_client, career_db, career_matcher)
     if 'conversation_started' not in st.session_state:
         st.session_state.conversation_started = False
     if 'current_mode' not in st.session_state:
@@ -165,14 +173,20 @@ def display_sidebar():
                 if profile.hobbies:
                     st.write(f"**Hobbies:** {', '.join(profile.hobbies[:3])}{'...' if len(profile.hobbies) > 3 else ''}")
         
-        # API Status
+        # API Status (cached; probing happens in the background)
         st.subheader("🔧 System Status")
-        api_key = os.getenv("GROQ_API_KEY")
-        if api_key:
-            st.success("✅ Groq API Connected")
-        else:
+        status = st.session_state.llm_client.get_status()
+        if not status["configured"]:
             st.error("❌ Groq API Key Missing")
             st.info("Add GROQ_API_KEY to your environment variables")
+        elif status["connected"] is None:
+            st.info("⏳ Checking Groq API connection...")
+        elif status["connected"]:
+            st.success("✅ Groq API Connected")
+        else:
+            st.error("❌ Groq API Unreachable")
+            if status["error"]:
+                st.caption(status["error"])
 
 def display_quick_mode():
     """Display quick recommendation mode"""
@@ -258,7 +272,7 @@ def generate_quick_recommendations(scenario_title, scenario):
             )
             
             # Get career recommendations
-            recommendations = st.session_state.career_matcher.find_matching_careers(profile)
+            recommendations = st.session_state.career_matcher.find_matching_careers(profile, limit=3)
             
             if recommendations:
                 st.session_state.quick_recommendations = recommendations[:3]
@@ -343,6 +357,10 @@ def display_conversational_mode():
         
         st.markdown('</div>', unsafe_allow_html=True)
     
+    # Recommendations stay on screen across reruns so degraded explanations can be upgraded
+    if st.session_state.conversation_manager.state.career_recommendations:
+        display_conversation_recommendations()
+    
     # User input
     user_input = st.chat_input("Type your message here...")
     
@@ -350,19 +368,31 @@ def display_conversational_mode():
         # Add user message to history
         st.session_state.chat_history.append({"role": "user", "content": user_input})
         
-        # Generate response
-        with st.spinner("PathFinder is thinking..."):
-            try:
-                response = st.session_state.conversation_manager.process_user_input(user_input)
-                st.session_state.chat_history.append({"role": "assistant", "content": response})
-                
-                # Check if we have career recommendations
-                if st.session_state.conversation_manager.state.career_recommendations:
-                    display_conversation_recommendations()
-                
-            except Exception as e:
-                error_msg = f"Sorry, I encountered an error: {str(e)}"
-                st.session_state.chat_history.append({"role": "assistant", "content": error_msg})
+        st.markdown(f"""
+        <div class="user-message">
+            {user_input}
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Generate response, rendering it as tokens arrive
+        response_placeholder = st.empty()
+        response_placeholder.markdown("*PathFinder is thinking...*")
+        try:
+            response = ""
+            # closing() cancels the turn's LLM calls if a rerun interrupts the stream
+            with closing(st.session_state.conversation_manager.process_user_input_stream(user_input)) as chunks:
+                for chunk in chunks:
+                    response += chunk
+                    response_placeholder.markdown(f"""
+                    <div class="assistant-message">
+                        <strong>PathFinder:</strong> {response}
+                    </div>
+                    """, unsafe_allow_html=True)
+            st.session_state.chat_history.append({"role": "assistant", "content": response})
+            
+        except Exception as e:
+            error_msg = f"Sorry, I encountered an error: {str(e)}"
+            st.session_state.chat_history.append({"role": "assistant", "content": error_msg})
         
         st.rerun()
 
@@ -379,8 +409,15 @@ def display_conversation_recommendations():
                 
                 with col1:
                     st.write(f"**Description:** {career.description}")
-                    if career.explanation:
-                        st.write(f"**Why this matches you:** {career.explanation}")
+                    explanation = career.resolve_explanation()
+                    if explanation:
+                        st.write(f"**Why this matches you:** {explanation}")
+                    if career.explanation_degraded:
+                        # The turn ran short on time, so this is a quick summary
+                        if st.button("Get a personalized explanation", key=f"upgrade_explanation_{i}"):
+                            with st.spinner("Writing a personalized explanation..."):
+                                career.upgrade_explanation()
+                            st.rerun()
                     st.write(f"**Education Required:** {career.education_requirements}")
                 
                 with col2:
@@ -1,9 +1,56 @@
-from typing import Dict, List
+import re
+from typing import Dict, Iterable, List, NamedTuple, FrozenSet, Pattern, Tuple
 from src.models import CareerPath, InterestCategory
+from src.vocabulary import TECH_KEYWORDS, CREATIVE_KEYWORDS
+
+class CareerFeatures(NamedTuple):
+    """Lowercased, pre-split career text used by CareerMatcher scoring"""
+    title_words: Tuple[str, ...]
+    skills: Tuple[str, ...]       # lowercased, in required_skills order
+    description_words: FrozenSet[str]
+    text_tokens: FrozenSet[str]   # title and description words
+    category_keywords: FrozenSet[str]
+    keywords: FrozenSet[str]      # title words, category keywords and skills
+    keyword_pattern: Pattern      # searches a string for any of ``keywords``
+    skill_pattern: Pattern        # searches a string for any skill or word of a skill
+
+def _any_substring_pattern(words: Iterable[str]) -> Pattern:
+    """Regex whose search() succeeds exactly when one of words is a substring"""
+    words = sorted(set(words), key=len, reverse=True)
+    if not words:
+        return re.compile(r"(?!)")
+    return re.compile("|".join(re.escape(word) for word in words))
+
+def build_career_features(career: CareerPath) -> CareerFeatures:
+    title_words = tuple(career.title.lower().split())
+    skills = tuple(skill.lower() for skill in career.required_skills)
+    description_words = frozenset(career.description.lower().split())
+    if career.category == InterestCategory.TECHNOLOGY:
+        category_keywords = frozenset(TECH_KEYWORDS)
+    elif career.category == InterestCategory.ARTS:
+        category_keywords = frozenset(CREATIVE_KEYWORDS)
+    else:
+        category_keywords = frozenset()
+    keywords = frozenset(title_words) | category_keywords | frozenset(skills)
+    skill_terms = set(skills)
+    for skill in skills:
+        skill_terms.update(skill.split())
+    return CareerFeatures(
+        title_words=title_words,
+        skills=skills,
+        description_words=description_words,
+        text_tokens=frozenset(title_words) | description_words,
+        category_keywords=category_keywords,
+        keywords=keywords,
+        keyword_pattern=_any_substring_pattern(keywords),
+        skill_pattern=_any_substring_pattern(skill_terms)
+    )
 
 class CareerDatabase:
     def __init__(self):
         self.careers = self._initialize_careers()
+        # Built once so scoring never re-normalizes career text
+        self.features = {career.title: build_career_features(career) for career in self.careers.values()}
     
     def _initialize_careers(self) -> Dict[str, CareerPath]:
         careers = {}
@@ -322,6 +369,13 @@ class CareerDatabase:
         """Get all available career paths"""
         return list(self.careers.values())
     
+    def get_career_features(self, career: CareerPath) -> CareerFeatures:
+        """Precomputed scoring features for a career (built on the fly for careers not in the database)"""
+        features = self.features.get(career.title)
+        if features is None:
+            features = build_career_features(career)
+        return features
+    
     def get_career_by_title(self, title: str) -> CareerPath:
         """Get a specific career by title"""
         for career in self.careers.values():
@@ -1,168 +1,96 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, FrozenSet, NamedTuple
+import os
 import re
-from src.models import StudentProfile, CareerPath, InterestCategory
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import partial
+from src.models import StudentProfile, CareerPath, InterestCategory, MatchExplanations
 from src.career_database import CareerDatabase
-from src.llm_client import LLMClient
+from src.llm_client import LLMClient, TaskType
+from src.prompt_templates import PromptTemplates
+from src.rate_limiter import RequestPriority
+from src.deadlines import Deadline
+from src.vocabulary import INTEREST_MAPPINGS, TECH_KEYWORDS, CREATIVE_KEYWORDS
+from src.keyword_automaton import KeywordAutomaton
+
+# Marks a _category_cache miss, since None is a valid cached category
+_MISSING = object()
+
+class ProfileFeatures(NamedTuple):
+    """A student profile normalized once for scoring against every career"""
+    interests: List[str]                                   # interests + hobbies, lowercased
+    interest_categories: List[Optional[InterestCategory]]  # category of each of those
+    subjects: List[str]                                    # preferred subjects, lowercased
+    activities: List[str]                                  # activities + interests + hobbies, lowercased
+    goal_words: Optional[FrozenSet[str]]                   # words of the career goals; None if none given
 
 class CareerMatcher:
-    def __init__(self, career_db: CareerDatabase, llm_client: LLMClient):
+    def __init__(self, career_db: CareerDatabase, llm_client: LLMClient,
+                 max_concurrency: Optional[int] = None, explanation_timeout: Optional[float] = None,
+                 explanation_strategy: Optional[str] = None):
         self.career_db = career_db
         self.llm_client = llm_client
         
-        # Define comprehensive interest-to-category mappings
-        self.interest_mappings = {
-            # STEM & Technology - Enhanced mappings
-            'programming': InterestCategory.TECHNOLOGY,
-            'coding': InterestCategory.TECHNOLOGY,
-            'computer': InterestCategory.TECHNOLOGY,
-            'technology': InterestCategory.TECHNOLOGY,
-            'software': InterestCategory.TECHNOLOGY,
-            'web development': InterestCategory.TECHNOLOGY,
-            'app development': InterestCategory.TECHNOLOGY,
-            'artificial intelligence': InterestCategory.TECHNOLOGY,
-            'ai': InterestCategory.TECHNOLOGY,
-            'machine learning': InterestCategory.TECHNOLOGY,
-            'ml': InterestCategory.TECHNOLOGY,
-            'nlp': InterestCategory.TECHNOLOGY,
-            'natural language processing': InterestCategory.TECHNOLOGY,
-            'data science': InterestCategory.STEM,
-            'algorithms': InterestCategory.TECHNOLOGY,
-            'python': InterestCategory.TECHNOLOGY,
-            'javascript': InterestCategory.TECHNOLOGY,
-            'react': InterestCategory.TECHNOLOGY,
-            'streamlit': InterestCategory.TECHNOLOGY,
-            'llm': InterestCategory.TECHNOLOGY,
-            'large language models': InterestCategory.TECHNOLOGY,
-            
-            'math': InterestCategory.STEM,
-            'mathematics': InterestCategory.STEM,
-            'science': InterestCategory.STEM,
-            'physics': InterestCategory.STEM,
-            'chemistry': InterestCategory.STEM,
-            'biology': InterestCategory.STEM,
-            'engineering': InterestCategory.STEM,
-            'data': InterestCategory.STEM,
-            'statistics': InterestCategory.STEM,
-            'analytics': InterestCategory.STEM,
-            
-            # Arts & Creative - Enhanced mappings
-            'art': InterestCategory.ARTS,
-            'arts': InterestCategory.ARTS,
-            'creative': InterestCategory.ARTS,
-            'creativity': InterestCategory.ARTS,
-            'drawing': InterestCategory.ARTS,
-            'painting': InterestCategory.ARTS,
-            'music': InterestCategory.ARTS,
-            'singing': InterestCategory.ARTS,
-            'design': InterestCategory.ARTS,
-            'graphic design': InterestCategory.ARTS,
-            'visual design': InterestCategory.ARTS,
-            'photography': InterestCategory.ARTS,
-            'writing': InterestCategory.ARTS,
-            'creative writing': InterestCategory.ARTS,
-            'literature': InterestCategory.ARTS,
-            'drama': InterestCategory.ARTS,
-            'theater': InterestCategory.ARTS,
-            'theatre': InterestCategory.ARTS,
-            'film': InterestCategory.ARTS,
-            'video': InterestCategory.ARTS,
-            'animation': InterestCategory.ARTS,
-            'illustration': InterestCategory.ARTS,
-            'digital art': InterestCategory.ARTS,
-            'fine arts': InterestCategory.ARTS,
-            'visual arts': InterestCategory.ARTS,
-            'english': InterestCategory.ARTS,  # English often relates to creative writing
-            
-            # Healthcare
-            'health': InterestCategory.HEALTHCARE,
-            'medicine': InterestCategory.HEALTHCARE,
-            'medical': InterestCategory.HEALTHCARE,
-            'helping people': InterestCategory.HEALTHCARE,
-            'care': InterestCategory.HEALTHCARE,
-            'nursing': InterestCategory.HEALTHCARE,
-            'doctor': InterestCategory.HEALTHCARE,
-            'physician': InterestCategory.HEALTHCARE,
-            'helping people': InterestCategory.HEALTHCARE,
-            'patient care': InterestCategory.HEALTHCARE,
-            'human health': InterestCategory.HEALTHCARE,
-            'medical care': InterestCategory.HEALTHCARE,
-            
-            # Business & Finance
-            'business': InterestCategory.BUSINESS,
-            'finance': InterestCategory.BUSINESS,
-            'money': InterestCategory.BUSINESS,
-            'economics': InterestCategory.BUSINESS,
-            'marketing': InterestCategory.BUSINESS,
-            'sales': InterestCategory.BUSINESS,
-            'management': InterestCategory.BUSINESS,
-            'entrepreneurship': InterestCategory.BUSINESS,
-            'startup': InterestCategory.BUSINESS,
-            
-            # Education
-            'teaching': InterestCategory.EDUCATION,
-            'education': InterestCategory.EDUCATION,
-            'tutoring': InterestCategory.EDUCATION,
-            'mentoring': InterestCategory.EDUCATION,
-            
-            # Sports & Recreation
-            'sports': InterestCategory.SPORTS,
-            'athletics': InterestCategory.SPORTS,
-            'fitness': InterestCategory.SPORTS,
-            'exercise': InterestCategory.SPORTS,
-            'physical': InterestCategory.SPORTS,
-            
-            # Social Services
-            'social work': InterestCategory.SOCIAL_SERVICES,
-            'community': InterestCategory.SOCIAL_SERVICES,
-            'volunteering': InterestCategory.SOCIAL_SERVICES,
-            'counseling': InterestCategory.SOCIAL_SERVICES,
-            
-            # Law
-            'law': InterestCategory.LAW,
-            'legal': InterestCategory.LAW,
-            'justice': InterestCategory.LAW,
-            'debate': InterestCategory.LAW,
-            
-            # Environment
-            'environment': InterestCategory.ENVIRONMENT,
-            'nature': InterestCategory.ENVIRONMENT,
-            'outdoors': InterestCategory.ENVIRONMENT,
-            'sustainability': InterestCategory.ENVIRONMENT,
-        }
-        
-        # Technology-specific keywords for enhanced matching
-        self.tech_keywords = [
-            'coding', 'programming', 'software', 'ai', 'artificial intelligence',
-            'machine learning', 'nlp', 'natural language processing', 'data science',
-            'web development', 'app development', 'python', 'javascript', 'react',
-            'streamlit', 'llm', 'algorithms', 'computer science', 'technology'
-        ]
-        
-        # Creative/Arts keywords for enhanced matching
-        self.creative_keywords = [
-            'art', 'arts', 'creative', 'creativity', 'design', 'drawing', 'painting',
-            'music', 'writing', 'literature', 'photography', 'visual', 'graphic',
-            'illustration', 'animation', 'film', 'video', 'theater', 'drama'
-        ]
+        # Explanation fan-out settings: how many LLM calls run at once and how
+        # long (seconds) a single explanation may take before we fall back
+        self.max_concurrency = max(1, max_concurrency or int(os.getenv("EXPLANATION_CONCURRENCY", "4")))
+        self.explanation_timeout = explanation_timeout or float(os.getenv("EXPLANATION_TIMEOUT", "20"))
+        
+        # "batched" explains all top-k careers in one LLM call, "per_career" makes one call each
+        self.explanation_strategy = explanation_strategy or os.getenv("EXPLANATION_STRATEGY", "batched")
+        
+        # With less than this many seconds left on the caller's deadline, no new
+        # explanation call is started and a template explanation is used instead
+        self.min_explanation_budget = float(os.getenv("EXPLANATION_MIN_BUDGET", "5"))
+        
+        # Keyword vocabulary (shared with the rule-based profile extractor)
+        self.interest_mappings = INTEREST_MAPPINGS
+        self.tech_keywords = TECH_KEYWORDS
+        self.creative_keywords = CREATIVE_KEYWORDS
+        
+        # All three keyword lists compiled into one automaton, so classifying an
+        # interest is a single pass over it. Automaton indices are the mapping
+        # keywords (in dict order), then the tech keywords, then the creative ones.
+        self._mapping_categories = list(self.interest_mappings.values())
+        self._tech_start = len(self._mapping_categories)
+        self._creative_start = self._tech_start + len(self.tech_keywords)
+        self._keyword_automaton = KeywordAutomaton(
+            list(self.interest_mappings) + list(self.tech_keywords) + list(self.creative_keywords)
+        )
+        self._category_cache: Dict[str, Optional[InterestCategory]] = {}
     
-    def find_matching_careers(self, student_profile: StudentProfile) -> List[CareerPath]:
-        """Find careers that match the student's profile with improved accuracy"""
+    def find_matching_careers(self, student_profile: StudentProfile, limit: int = 8,
+                              explain_top_k: Optional[int] = None,
+                              session_id: Optional[str] = None,
+                              deadline: Optional[Deadline] = None) -> List[CareerPath]:
+        """Find careers that match the student's profile with improved accuracy
+
+        Scoring and ranking run first; LLM explanations are only generated for
+        the first ``explain_top_k`` results (all returned results by default).
+        The remaining results carry a deferred explanation that is produced on
+        ``CareerPath.resolve_explanation()``, falling back the same way if
+        that call fails. Explanation calls are queued as
+        background work for ``session_id`` in the LLM client's rate limiter.
+        Careers that could not be explained within ``deadline`` (or whose
+        call failed) get a template explanation built from the match scores
+        and are flagged ``explanation_degraded`` so the UI can upgrade them.
+        """
         all_careers = self.career_db.get_all_careers()
         scored_careers = []
         
+        # Lowercase and split the profile once rather than once per career
+        profile = self._build_profile_features(student_profile)
+        
         # Get primary interest categories
         primary_categories = self._get_primary_categories(student_profile)
         
         for career in all_careers:
             # Calculate match score with enhanced logic
-            match_score = self._calculate_match_score(student_profile, career)
+            match_score = self._calculate_match_score(student_profile, career, profile)
             
             # Apply strict filtering based on primary interests
             if self._should_include_career(student_profile, career, match_score, primary_categories):
-                # Generate personalized explanation using LLM
-                explanation = self._generate_career_explanation(student_profile, career, match_score)
-                
-                # Create a copy with updated score and explanation
+                # Create a copy with updated score; explanation is filled in after ranking
                 matched_career = CareerPath(
                     title=career.title,
                     category=career.category,
@@ -173,15 +101,158 @@ class CareerMatcher:
                     job_outlook=career.job_outlook,
                     related_careers=career.related_careers,
                     match_score=match_score,
-                    explanation=explanation
+                    explanation=""
                 )
                 
                 scored_careers.append(matched_career)
         
-        # Sort by match score and return top matches
+        # Sort by match score and keep top matches
         sorted_careers = sorted(scored_careers, key=lambda x: x.match_score, reverse=True)
+        top_careers = sorted_careers[:limit]
+        
+        if explain_top_k is None:
+            explain_top_k = len(top_careers)
+        
+        # Generate personalized explanations only for the careers that will be shown
+        explained_careers = top_careers[:explain_top_k]
+        explanations = self._explain_careers(student_profile, explained_careers, session_id, deadline)
+        for career, explanation in zip(explained_careers, explanations):
+            if explanation is None:
+                career.set_degraded_explanation(
+                    self._template_explanation(student_profile, career),
+                    self._make_explanation_loader(student_profile, career, session_id)
+                )
+            else:
+                career.explanation = explanation
+        
+        for career in top_careers[explain_top_k:]:
+            career.set_explanation_loader(
+                self._make_explanation_loader(student_profile, career, session_id),
+                partial(self._template_explanation, student_profile.model_copy(deep=True), career)
+            )
+        
+        return top_careers
+    
+    def _explain_careers(self, student_profile: StudentProfile, careers: List[CareerPath],
+                         session_id: Optional[str] = None,
+                         deadline: Optional[Deadline] = None) -> List[Optional[str]]:
+        """Generate explanations for careers, returned in the same (rank) order
+
+        None marks a career left unexplained because the deadline was too
+        close or its call failed.
+        """
+        if not careers:
+            return []
+        if not self._has_explanation_budget(deadline):
+            return [None] * len(careers)
+        if self.explanation_strategy != "batched" or len(careers) == 1:
+            return self._explain_careers_individually(student_profile, careers, session_id, deadline)
+        
+        batched = self._generate_batched_explanations(student_profile, careers, session_id, deadline)
+        
+        # Careers the batched answer skipped go through the per-career path,
+        # unless the provider is down and those calls would fail too
+        missing = [career for career in careers if career.title not in batched]
+        if missing and self.llm_client.circuit_open():
+            for career in missing:
+                batched[career.title] = None
+        elif missing:
+            for career, explanation in zip(missing, self._explain_careers_individually(student_profile, missing,
+                                                                                       session_id, deadline)):
+                batched[career.title] = explanation
+        
+        return [batched[career.title] for career in careers]
+    
+    def _has_explanation_budget(self, deadline: Optional[Deadline]) -> bool:
+        """Whether there is time left to start another explanation call"""
+        if deadline is None:
+            return True
+        remaining = deadline.remaining()
+        return not deadline.cancelled and (remaining is None or remaining >= self.min_explanation_budget)
+    
+    def _explain_careers_individually(self, student_profile: StudentProfile, careers: List[CareerPath],
+                                      session_id: Optional[str] = None,
+                                      deadline: Optional[Deadline] = None) -> List[Optional[str]]:
+        """Generate one explanation per career concurrently, keeping rank order
+
+        Careers that time out, fail, or would start too close to the deadline
+        come back as None.
+        """
+        if len(careers) == 1 or self.max_concurrency == 1:
+            explanations = []
+            for career in careers:
+                try:
+                    explanations.append(self._request_career_explanation(student_profile, career, session_id,
+                                                                         deadline=deadline))
+                except Exception as e:
+                    print(f"Error generating career explanation: {e}")
+                    explanations.append(None)
+            return explanations
+        
+        # Per-call start times, so the timeout only counts time spent on the call
+        # itself and not time spent queued behind the concurrency cap
+        started_at: Dict[int, float] = {}
+        
+        def explain(index: int, career: CareerPath) -> Optional[str]:
+            started_at[index] = time.monotonic()
+            return self._request_career_explanation(student_profile, career, session_id, deadline=deadline)
+        
+        executor = ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(careers)),
+                                      thread_name_prefix="career-explainer")
+        try:
+            futures = [executor.submit(explain, index, career) for index, career in enumerate(careers)]
+            
+            explanations = []
+            for index, (career, future) in enumerate(zip(careers, futures)):
+                try:
+                    explanations.append(self._wait_for_explanation(future, lambda: started_at.get(index)))
+                except FutureTimeoutError:
+                    print(f"Explanation for {career.title} timed out after {self.explanation_timeout:.1f}s")
+                    explanations.append(None)
+                except Exception as e:
+                    print(f"Error generating career explanation: {e}")
+                    explanations.append(None)
+            return explanations
+        finally:
+            # Don't block on calls that already timed out; their results are discarded
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _wait_for_explanation(self, future, get_start_time: Callable[[], Optional[float]]) -> str:
+        """Wait for one explanation future, enforcing the per-call timeout"""
+        while True:
+            start_time = get_start_time()
+            remaining = (self.explanation_timeout if start_time is None
+                         else start_time + self.explanation_timeout - time.monotonic())
+            try:
+                return future.result(timeout=max(remaining, 0.0))
+            except FutureTimeoutError:
+                # Still queued behind other calls: keep waiting for its turn
+                start_time = get_start_time()
+                if start_time is not None and time.monotonic() - start_time >= self.explanation_timeout:
+                    future.cancel()
+                    raise
+    
+    def _make_explanation_loader(self, student_profile: StudentProfile, career: CareerPath,
+                                 session_id: Optional[str] = None) -> Callable[[], Optional[str]]:
+        """Bind a deferred explanation call for a ranked career (None if the LLM call fails)"""
+        profile_snapshot = student_profile.model_copy(deep=True)
+        
+        def load_explanation() -> Optional[str]:
+            # Resolved while the UI is rendering, so the student is waiting on it
+            return self._generate_career_explanation(profile_snapshot, career, career.match_score,
+                                                     session_id, RequestPriority.INTERACTIVE)
         
-        return sorted_careers[:8]  # Return top 8 matches
+        return load_explanation
+    
+    def _build_profile_features(self, student_profile: StudentProfile) -> ProfileFeatures:
+        interests = student_profile.interests + student_profile.hobbies
+        return ProfileFeatures(
+            interests=[interest.lower() for interest in interests],
+            interest_categories=[self._get_interest_category(interest) for interest in interests],
+            subjects=[subject.lower() for subject in student_profile.preferred_subjects],
+            activities=[activity.lower() for activity in student_profile.extracurricular_activities + interests],
+            goal_words=frozenset(student_profile.career_goals.lower().split()) if student_profile.career_goals else None
+        )
     
     def _get_primary_categories(self, student_profile: StudentProfile) -> List[InterestCategory]:
         """Identify the primary interest categories for the student"""
@@ -191,19 +262,21 @@ class CareerMatcher:
         category_scores = {}
         
         for interest in all_interests:
-            interest_lower = interest.lower()
+            matched = self._keyword_automaton.find(interest.lower())
             
-            # Check for direct keyword matches
-            for keyword, category in self.interest_mappings.items():
-                if keyword in interest_lower:
-                    category_scores[category] = category_scores.get(category, 0) + 1
+            # Check for direct keyword matches (in mapping order, so ties rank as before)
+            for index in sorted(matched):
+                if index >= self._tech_start:
+                    break
+                category = self._mapping_categories[index]
+                category_scores[category] = category_scores.get(category, 0) + 1
             
             # Boost scores for strong indicators
-            if any(tech_word in interest_lower for tech_word in self.tech_keywords):
+            if any(self._tech_start <= index < self._creative_start for index in matched):
                 category_scores[InterestCategory.TECHNOLOGY] = category_scores.get(InterestCategory.TECHNOLOGY, 0) + 2
                 category_scores[InterestCategory.STEM] = category_scores.get(InterestCategory.STEM, 0) + 1
             
-            if any(creative_word in interest_lower for creative_word in self.creative_keywords):
+            if any(index >= self._creative_start for index in matched):
                 category_scores[InterestCategory.ARTS] = category_scores.get(InterestCategory.ARTS, 0) + 2
         
         # Return categories with score > 0, sorted by score
@@ -245,80 +318,78 @@ class CareerMatcher:
         
         return True
     
-    def _calculate_match_score(self, student_profile: StudentProfile, career: CareerPath) -> float:
+    def _calculate_match_score(self, student_profile: StudentProfile, career: CareerPath,
+                               profile: Optional[ProfileFeatures] = None) -> float:
         """Calculate how well a career matches a student's profile with enhanced accuracy"""
+        profile = profile or self._build_profile_features(student_profile)
         score = 0.0
         total_weight = 0.0
         
         # Interest matching (weight: 0.4) - Increased weight for interests
-        interest_score = self._calculate_interest_match(student_profile, career)
+        interest_score = self._calculate_interest_match(student_profile, career, profile)
         score += interest_score * 0.4
         total_weight += 0.4
         
         # Academic subject matching (weight: 0.25)
-        academic_score = self._calculate_academic_match(student_profile, career)
+        academic_score = self._calculate_academic_match(student_profile, career, profile)
         score += academic_score * 0.25
         total_weight += 0.25
         
         # Skills alignment (weight: 0.2)
-        skills_score = self._calculate_skills_match(student_profile, career)
+        skills_score = self._calculate_skills_match(student_profile, career, profile)
         score += skills_score * 0.2
         total_weight += 0.2
         
         # Career goals alignment (weight: 0.15)
-        goals_score = self._calculate_goals_match(student_profile, career)
+        goals_score = self._calculate_goals_match(student_profile, career, profile)
         score += goals_score * 0.15
         total_weight += 0.15
         
         return min(score / total_weight if total_weight > 0 else 0.0, 1.0)
     
-    def _calculate_interest_match(self, student_profile: StudentProfile, career: CareerPath) -> float:
+    def _calculate_interest_match(self, student_profile: StudentProfile, career: CareerPath,
+                                  profile: Optional[ProfileFeatures] = None) -> float:
         """Calculate interest matching score with enhanced keyword matching"""
-        if not student_profile.interests and not student_profile.hobbies:
-            return 0.0
-        
-        all_interests = student_profile.interests + student_profile.hobbies
-        match_score = 0.0
-        total_interests = len(all_interests)
-        
+        profile = profile or self._build_profile_features(student_profile)
+        total_interests = len(profile.interests)
         if total_interests == 0:
             return 0.0
         
-        career_keywords = self._extract_career_keywords(career)
+        match_score = 0.0
+        features = self.career_db.get_career_features(career)
         
-        for interest in all_interests:
-            interest_lower = interest.lower()
-            
+        for interest_lower, interest_category in zip(profile.interests, profile.interest_categories):
             # Direct keyword matching with career
-            if any(keyword in interest_lower for keyword in career_keywords):
+            if features.keyword_pattern.search(interest_lower):
                 match_score += 1.0
                 continue
             
             # Category-based matching
-            interest_category = self._get_interest_category(interest)
             if interest_category == career.category:
                 match_score += 0.8
                 continue
             
             # Skill-based matching
-            if any(skill.lower() in interest_lower or interest_lower in skill.lower() 
-                   for skill in career.required_skills):
+            if any(skill in interest_lower or interest_lower in skill for skill in features.skills):
                 match_score += 0.6
                 continue
             
             # Partial text matching
-            if any(word in interest_lower for word in career.title.lower().split()):
+            if any(word in interest_lower for word in features.title_words):
                 match_score += 0.4
         
         return min(match_score / total_interests, 1.0)
     
-    def _calculate_academic_match(self, student_profile: StudentProfile, career: CareerPath) -> float:
+    def _calculate_academic_match(self, student_profile: StudentProfile, career: CareerPath,
+                                  profile: Optional[ProfileFeatures] = None) -> float:
         """Calculate academic subject matching score"""
-        if not student_profile.preferred_subjects:
+        profile = profile or self._build_profile_features(student_profile)
+        if not profile.subjects:
             return 0.5  # Neutral score if no academic info
         
         match_score = 0.0
-        total_subjects = len(student_profile.preferred_subjects)
+        total_subjects = len(profile.subjects)
+        title_words = self.career_db.get_career_features(career).title_words
         
         subject_career_mappings = {
             'computer science': ['Software Engineer', 'Data Scientist', 'AI/Machine Learning Engineer', 'Web Developer'],
@@ -331,9 +402,7 @@ class CareerMatcher:
             'chemistry': ['Medical Researcher', 'Research Scientist', 'Medical Doctor']
         }
         
-        for subject in student_profile.preferred_subjects:
-            subject_lower = subject.lower()
-            
+        for subject_lower in profile.subjects:
             # Direct mapping
             if subject_lower in subject_career_mappings:
                 if career.title in subject_career_mappings[subject_lower]:
@@ -341,7 +410,7 @@ class CareerMatcher:
                     continue
             
             # Partial keyword matching
-            if any(word in subject_lower for word in career.title.lower().split()):
+            if any(word in subject_lower for word in title_words):
                 match_score += 0.6
                 continue
             
@@ -352,26 +421,24 @@ class CareerMatcher:
         
         return min(match_score / total_subjects, 1.0)
     
-    def _calculate_skills_match(self, student_profile: StudentProfile, career: CareerPath) -> float:
+    def _calculate_skills_match(self, student_profile: StudentProfile, career: CareerPath,
+                                profile: Optional[ProfileFeatures] = None) -> float:
         """Calculate skills alignment score"""
-        all_activities = (student_profile.extracurricular_activities + 
-                         student_profile.interests + student_profile.hobbies)
-        
-        if not all_activities:
+        profile = profile or self._build_profile_features(student_profile)
+        if not profile.activities:
             return 0.5  # Neutral score
         
         match_score = 0.0
         skill_matches = 0
+        features = self.career_db.get_career_features(career)
         
-        for activity in all_activities:
-            activity_lower = activity.lower()
-            for skill in career.required_skills:
-                skill_lower = skill.lower()
-                if (skill_lower in activity_lower or activity_lower in skill_lower or
-                    any(word in activity_lower for word in skill_lower.split())):
-                    match_score += 1.0
-                    skill_matches += 1
-                    break
+        for activity_lower in profile.activities:
+            # A skill contained in the activity implies its words are too, so the
+            # pattern covers both checks; the reverse containment is tested directly
+            if (features.skill_pattern.search(activity_lower) or
+                any(activity_lower in skill for skill in features.skills)):
+                match_score += 1.0
+                skill_matches += 1
         
         # Bonus for multiple skill matches
         if skill_matches >= 3:
@@ -379,18 +446,17 @@ class CareerMatcher:
         elif skill_matches >= 2:
             match_score *= 1.1
         
-        return min(match_score / len(career.required_skills), 1.0)
+        return min(match_score / len(features.skills), 1.0)
     
-    def _calculate_goals_match(self, student_profile: StudentProfile, career: CareerPath) -> float:
+    def _calculate_goals_match(self, student_profile: StudentProfile, career: CareerPath,
+                               profile: Optional[ProfileFeatures] = None) -> float:
         """Calculate career goals alignment score"""
-        if not student_profile.career_goals:
+        profile = profile or self._build_profile_features(student_profile)
+        if profile.goal_words is None:
             return 0.5  # Neutral score
         
-        goals_text = student_profile.career_goals.lower()
-        career_text = (career.title + " " + career.description).lower()
-        
         # Keyword matching
-        common_words = set(goals_text.split()) & set(career_text.split())
+        common_words = profile.goal_words & self.career_db.get_career_features(career).text_tokens
         if len(common_words) >= 3:
             return 0.9
         elif len(common_words) >= 2:
@@ -400,64 +466,144 @@ class CareerMatcher:
         
         return 0.3
     
-    def _extract_career_keywords(self, career: CareerPath) -> List[str]:
-        """Extract relevant keywords from career information"""
-        keywords = []
-        
-        # Add title words
-        keywords.extend(career.title.lower().split())
-        
-        # Add category-specific keywords
-        if career.category == InterestCategory.TECHNOLOGY:
-            keywords.extend(self.tech_keywords)
-        elif career.category == InterestCategory.ARTS:
-            keywords.extend(self.creative_keywords)
-        
-        # Add skill keywords
-        keywords.extend([skill.lower() for skill in career.required_skills])
-        
-        return list(set(keywords))  # Remove duplicates
-    
     def _get_interest_category(self, interest: str) -> InterestCategory:
-        """Get the category for a given interest"""
-        interest_lower = interest.lower()
-        
-        for keyword, category in self.interest_mappings.items():
-            if keyword in interest_lower:
-                return category
-        
-        return None
+        """Get the category for a given interest (that of the first mapping keyword it contains)"""
+        # Scoring asks again for every career, so remember the answer per interest
+        # (.get, not a membership test then an index, so a concurrent clear() can't race it)
+        category = self._category_cache.get(interest, _MISSING)
+        if category is not _MISSING:
+            return category
+        
+        mapping_hits = [index for index in self._keyword_automaton.find(interest.lower()) if index < self._tech_start]
+        category = self._mapping_categories[min(mapping_hits)] if mapping_hits else None
+        if len(self._category_cache) >= 4096:
+            self._category_cache.clear()
+        self._category_cache[interest] = category
+        return category
     
-    def _generate_career_explanation(self, student_profile: StudentProfile, career: CareerPath, match_score: float) -> str:
-        """Generate personalized explanation for career match using LLM"""
+    def _generate_career_explanation(self, student_profile: StudentProfile, career: CareerPath, match_score: float,
+                                     session_id: Optional[str] = None,
+                                     priority: Optional[RequestPriority] = None) -> Optional[str]:
+        """Generate personalized explanation for career match using LLM; None if it fails"""
         try:
-            # Create context for LLM
-            student_info = f"""
-            Interests: {', '.join(student_profile.interests)}
-            Hobbies: {', '.join(student_profile.hobbies)}
-            Preferred subjects: {', '.join(student_profile.preferred_subjects)}
-            Career goals: {student_profile.career_goals or 'Not specified'}
-            """
-            
-            career_info = f"""
-            Title: {career.title}
-            Description: {career.description}
-            Required skills: {', '.join(career.required_skills)}
-            """
-            
-            prompt = f"""
-            Based on this student's profile and career information, explain in 1-2 sentences why this career is a {match_score:.0%} match.
-            
-            Student profile: {student_info}
-            Career: {career_info}
-            
-            Focus on specific connections between their interests/skills and the career requirements.
-            Be encouraging and specific.
-            """
-            
-            explanation = self.llm_client.generate_response_sync(prompt)
-            return explanation if explanation else f"This career aligns well with your interests and has a {match_score:.0%} compatibility score."
-            
+            return self._request_career_explanation(student_profile, career, session_id, priority)
         except Exception as e:
             print(f"Error generating career explanation: {e}")
-            return f"This career shows strong alignment with your profile ({match_score:.0%} match)."
+            return None
+    
+    def _request_career_explanation(self, student_profile: StudentProfile, career: CareerPath,
+                                    session_id: Optional[str] = None,
+                                    priority: Optional[RequestPriority] = None,
+                                    deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Ask the LLM to explain one match; None if the deadline is too close to start"""
+        if not self._has_explanation_budget(deadline):
+            return None
+        
+        # Create context for LLM
+        student_info = self._format_student_info(student_profile)
+        career_info = self._format_career_info(career)
+        
+        prompt = PromptTemplates.MATCH_EXPLANATION.render(
+            match_score=f"{career.match_score:.0%}", student_info=student_info, career_info=career_info
+        )
+        
+        # Errors propagate so callers use the template explanation, not the connection-error message
+        explanation = self.llm_client.generate_response_sync(prompt.user, prompt.system, session_id=session_id,
+                                                             priority=priority, task=TaskType.MATCH_EXPLANATION,
+                                                             deadline=deadline, raise_errors=True)
+        return explanation or None
+    
+    def _generate_batched_explanations(self, student_profile: StudentProfile, careers: List[CareerPath],
+                                       session_id: Optional[str] = None,
+                                       deadline: Optional[Deadline] = None) -> Dict[str, str]:
+        """Explain several careers with a single LLM call, keyed by career title"""
+        careers_info = "\n\n".join(
+            f"Career {i} ({career.match_score:.0%} match):\n{self._format_career_info(career)}"
+            for i, career in enumerate(careers, 1)
+        )
+        
+        prompt = PromptTemplates.BATCHED_MATCH_EXPLANATIONS.render(
+            student_info=self._format_student_info(student_profile), careers_info=careers_info
+        )
+        
+        try:
+            parsed = self.llm_client.generate_structured(
+                prompt.user, MatchExplanations, prompt.system, session_id=session_id,
+                task=TaskType.MATCH_EXPLANATION, deadline=deadline
+            )
+        except Exception as e:
+            print(f"Error generating batched career explanations: {e}")
+            return {}
+        
+        if parsed is None:
+            return {}
+        
+        # Map answers back onto our titles, tolerating case/whitespace differences
+        answers = {title.strip().lower(): text for title, text in parsed.root.items()}
+        explanations = {}
+        for career in careers:
+            text = answers.get(career.title.lower())
+            if text and text.strip():
+                explanations[career.title] = text.strip()
+        return explanations
+    
+    def _format_student_info(self, student_profile: StudentProfile) -> str:
+        """Student context shared by the explanation prompts"""
+        return f"""Interests: {', '.join(student_profile.interests)}
+Hobbies: {', '.join(student_profile.hobbies)}
+Preferred subjects: {', '.join(student_profile.preferred_subjects)}
+Career goals: {student_profile.career_goals or 'Not specified'}"""
+    
+    def _format_career_info(self, career: CareerPath) -> str:
+        """Career context shared by the explanation prompts"""
+        return f"""Title: {career.title}
+Description: {career.description}
+Required skills: {', '.join(career.required_skills)}"""
+    
+    def _template_explanation(self, student_profile: StudentProfile, career: CareerPath) -> str:
+        """Deterministic explanation built from the match components, used instead of an LLM call"""
+        profile = self._build_profile_features(student_profile)
+        components = [
+            ("interests", self._calculate_interest_match(student_profile, career, profile), bool(student_profile.interests or student_profile.hobbies)),
+            ("favorite subjects", self._calculate_academic_match(student_profile, career, profile), bool(student_profile.preferred_subjects)),
+            ("skills and activities", self._calculate_skills_match(student_profile, career, profile), bool(student_profile.extracurricular_activities or student_profile.interests or student_profile.hobbies)),
+            ("career goals", self._calculate_goals_match(student_profile, career, profile), bool(student_profile.career_goals)),
+        ]
+        # Components without profile data score a neutral 0.5, so they never count as strengths
+        strengths = [label for label, score, has_data in sorted(components, key=lambda c: c[1], reverse=True)
+                     if has_data and score >= 0.6]
+        
+        matched_interests, matched_skills = self._matched_keywords(student_profile, career)
+        sentences = []
+        if matched_interests:
+            sentence = f"Your interest in {self._join_words(matched_interests[:3])} connects directly to the {career.title} role"
+            if matched_skills:
+                sentence += f", which draws on {self._join_words(matched_skills[:3])}"
+            sentences.append(sentence + ".")
+        
+        if strengths:
+            sentences.append(f"It's a {career.match_score:.0%} match, strongest on your {self._join_words(strengths[:2])}.")
+        else:
+            sentences.append(f"It's a {career.match_score:.0%} match for your overall profile.")
+        return " ".join(sentences)
+    
+    def _matched_keywords(self, student_profile: StudentProfile, career: CareerPath):
+        """Student interests that hit this career's keywords, and the career skills they touch"""
+        features = self.career_db.get_career_features(career)
+        items = student_profile.interests + student_profile.hobbies + student_profile.extracurricular_activities
+        
+        matched_interests = []
+        matched_skills = []
+        for item in items:
+            item_lower = item.lower()
+            if item not in matched_interests and features.keyword_pattern.search(item_lower):
+                matched_interests.append(item)
+            for skill, skill_lower in zip(career.required_skills, features.skills):
+                if skill not in matched_skills and (skill_lower in item_lower or item_lower in skill_lower):
+                    matched_skills.append(skill)
+        return matched_interests, matched_skills
+    
+    def _join_words(self, words: List[str]) -> str:
+        if len(words) <= 1:
+            return "".join(words)
+        return ", ".join(words[:-1]) + " and " + words[-1]
@@ -1,4 +1,5 @@
 import asyncio
+from contextlib import closing
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
@@ -6,19 +7,18 @@ from rich.prompt import Prompt, Confirm
 from rich.table import Table
 from rich.columns import Columns
 from rich.align import Align
+from rich.live import Live
 from src.conversation_manager import ConversationManager
 from src.models import StudentProfile
-from src.career_database import CareerDatabase
-from src.career_matcher import CareerMatcher
-from src.llm_client import LLMClient
+from src import shared_resources
 
 class CLIInterface:
     def __init__(self):
         self.console = Console()
-        self.conversation_manager = ConversationManager()
-        self.career_db = CareerDatabase()
-        self.llm_client = LLMClient()
-        self.career_matcher = CareerMatcher(self.career_db, self.llm_client)
+        self.career_db = shared_resources.get_career_database()
+        self.llm_client = shared_resources.get_llm_client()
+        self.career_matcher = shared_resources.get_career_matcher()
+        self.conversation_manager = ConversationManager(self.llm_client, self.career_db, self.career_matcher)
         
     def run(self):
         """Run the CLI interface with mode selection"""
@@ -223,7 +223,7 @@ class CLIInterface:
         with self.console.status("[bold green]⚡ Generating recommendations with Groq..."):
             try:
                 # Get career recommendations
-                recommendations = self.career_matcher.find_matching_careers(profile)
+                recommendations = self.career_matcher.find_matching_careers(profile, limit=3)
                 
                 if not recommendations:
                     self.console.print("[red]No recommendations found. Please try a different scenario.[/red]")
@@ -346,11 +346,8 @@ class CLIInterface:
                     self.console.print("[yellow]Thanks for using PathFinder! Good luck with your career journey! 🎓[/yellow]")
                     break
                 
-                # Process input and get response
-                with self.console.status("[bold green]PathFinder is thinking..."):
-                    response = self.conversation_manager.process_user_input(user_input)
-                
-                self._display_message("PathFinder", response)
+                # Process input and render the response as it streams in
+                self._stream_message("PathFinder", self.conversation_manager.process_user_input_stream(user_input))
                 
                 # Check if we have recommendations to display
                 if self.conversation_manager.state.career_recommendations:
@@ -367,6 +364,22 @@ class CLIInterface:
     
     def _display_message(self, speaker, message):
         """Display a message with proper formatting"""
+        self.console.print(self._message_panel(speaker, message))
+    
+    def _stream_message(self, speaker, chunks):
+        """Display a message in a live panel that grows as chunks arrive"""
+        thinking = Text(f"{speaker} is thinking...", style="dim")
+        message = ""
+        # Closing the stream on Ctrl+C cancels the turn's in-flight LLM calls
+        with closing(chunks), Live(self._message_panel(speaker, thinking), console=self.console,
+                                   refresh_per_second=12) as live:
+            for chunk in chunks:
+                message += chunk
+                live.update(self._message_panel(speaker, message))
+        return message
+    
+    def _message_panel(self, speaker, message):
+        """Build the panel used to display a message"""
         if speaker == "PathFinder":
             style = "blue"
             icon = "🤖"
@@ -378,13 +391,11 @@ class CLIInterface:
         formatted_message.append(f"{icon} {speaker}: ", style=f"bold {style}")
         formatted_message.append(message)
         
-        panel = Panel(
+        return Panel(
             formatted_message,
             border_style=style,
             padding=(1, 2)
         )
-        
-        self.console.print(panel)
     
     def _display_conversational_recommendations(self):
         """Display career recommendations from conversational mode"""
@@ -409,8 +420,11 @@ class CLIInterface:
             details_table.add_row("📈 Job Outlook", career.job_outlook)
             details_table.add_row("🎓 Education", career.education_requirements)
             
-            if career.explanation:
-                details_table.add_row("💡 Why it matches", career.explanation)
+            explanation = career.resolve_explanation()
+            if explanation:
+                if career.explanation_degraded:
+                    explanation += " [dim](quick summary)[/dim]"
+                details_table.add_row("💡 Why it matches", explanation)
             
             details_table.add_row("🛠️ Key Skills", ", ".join(career.required_skills[:4]) + ("..." if len(career.required_skills) > 4 else ""))
             
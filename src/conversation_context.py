@@ -0,0 +1,105 @@
+import threading
+from typing import Dict, Any, List, Optional
+from src.models import ConversationState, ConversationSummary
+from src.llm_client import LLMClient, TaskType
+from src.prompt_templates import PromptTemplates
+from src.token_budget import count_tokens
+
+class ConversationContext:
+    """Token-budgeted view of a conversation: a rolling summary plus the latest messages
+
+    Once the unsummarized messages exceed ``window_tokens``, the oldest of
+    them are folded into ``state.conversation_summary`` by a background LLM
+    call, leaving about half the window for new turns. Prompts built with
+    render() therefore stay roughly constant in size however long the
+    session runs.
+    """
+
+    def __init__(self, state: ConversationState, llm_client: LLMClient, session_id: Optional[str] = None,
+                 window_tokens: int = 800, summary_words: int = 150):
+        self.state = state
+        self.llm_client = llm_client
+        self.session_id = session_id
+        self.window_tokens = window_tokens
+        self.summary_words = summary_words
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def recent_messages(self, token_budget: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest messages not yet covered by the summary that fit in token_budget (at least one)"""
+        budget = token_budget or self.window_tokens
+        history = self.state.conversation_history
+        selected = []
+        used = 0
+        for message in reversed(history[self.state.summarized_messages:]):
+            cost = count_tokens(message["content"])
+            if selected and used + cost > budget:
+                break
+            selected.append(message)
+            used += cost
+        return list(reversed(selected))
+
+    def render(self, token_budget: Optional[int] = None, role_names: Optional[Dict[str, str]] = None) -> str:
+        """Summary (if any) followed by the recent messages, one "role: content" line each"""
+        lines = []
+        if self.state.conversation_summary:
+            lines.append(f"Summary of earlier conversation: {self.state.conversation_summary}")
+        for message in self.recent_messages(token_budget):
+            role = role_names.get(message["role"], message["role"]) if role_names else message["role"]
+            lines.append(f"{role}: {message['content']}")
+        return "\n".join(lines)
+
+    def refresh_summary(self):
+        """Fold old messages into the summary in the background, if the window has overflowed"""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            start = self.state.summarized_messages
+            end = self._fold_boundary()
+            if end <= start:
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._summarize, args=(start, end), name="conversation-summary", daemon=True
+            )
+            self._refresh_thread.start()
+
+    def _fold_boundary(self) -> int:
+        """Index up to which messages should be summarized (summarized_messages if none)"""
+        history = self.state.conversation_history
+        start = self.state.summarized_messages
+        costs = [count_tokens(message["content"]) for message in history[start:]]
+        if sum(costs) <= self.window_tokens:
+            return start
+
+        # Keep the newest messages that fit in half the window (and at least the last turn)
+        kept = 0
+        used = 0
+        for cost in reversed(costs):
+            if kept >= 2 and used + cost > self.window_tokens // 2:
+                break
+            kept += 1
+            used += cost
+        return len(history) - kept
+
+    def _summarize(self, start: int, end: int):
+        messages = self.state.conversation_history[start:end]
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        prompt = PromptTemplates.CONVERSATION_SUMMARY.render(
+            summary_words=self.summary_words, summary=self.state.conversation_summary or 'None yet',
+            transcript=transcript
+        )
+        try:
+            result = self.llm_client.generate_structured(prompt.user, ConversationSummary, prompt.system,
+                                                         session_id=self.session_id,
+                                                         task=TaskType.CONVERSATION_SUMMARY)
+        except Exception as e:
+            print(f"Error summarizing conversation: {e}")
+            return
+        if result is None or not result.summary.strip():
+            return
+
+        with self._lock:
+            # Ignore the result if the history was reset or summarized meanwhile
+            if self.state.summarized_messages == start and len(self.state.conversation_history) >= end:
+                self.state.conversation_summary = result.summary.strip()
+                self.state.summarized_messages = end
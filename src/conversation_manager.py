@@ -1,19 +1,61 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Iterator, Tuple, Union
 import json
-from src.models import ConversationState, StudentProfile, CareerPath
-from src.llm_client import LLMClient
-from src.prompt_templates import PromptTemplates
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from src.models import ConversationState, StudentProfile, CareerPath, ProfileExtraction, TurnResult
+from src.llm_client import LLMClient, TaskType
+from src.prompt_templates import PromptTemplates, RenderedPrompt, PROFILE_SCHEMA
 from src.career_database import CareerDatabase
 from src.career_matcher import CareerMatcher
+from src.deadlines import Deadline, DeadlineExceeded, RequestCancelled
+from src.conversation_context import ConversationContext
+from src.token_budget import PromptSection
+from src.json_parser import StreamedObjectReader
+from src import shared_resources
+
+# Runs the speculative contextual reply while the profile is being extracted. A turn
+# that finds every worker busy takes the serial path instead of queueing behind them
+_speculation_workers = max(1, int(os.getenv("SPECULATION_WORKERS", "8")))
+_speculation_executor = ThreadPoolExecutor(max_workers=_speculation_workers, thread_name_prefix="reply-speculation")
+_speculation_slots = threading.BoundedSemaphore(_speculation_workers)
 
 class ConversationManager:
-    def __init__(self):
+    def __init__(self, llm_client: Optional[LLMClient] = None,
+                 career_db: Optional[CareerDatabase] = None,
+                 career_matcher: Optional[CareerMatcher] = None):
         self.state = ConversationState()
-        self.llm_client = LLMClient()
+        self.session_id = uuid.uuid4().hex  # Identifies this session to the LLM rate limiter
+        # Heavy, stateless services are shared across sessions unless injected
+        self.llm_client = llm_client or shared_resources.get_llm_client()
         self.prompt_templates = PromptTemplates()
-        self.career_db = CareerDatabase()
-        self.career_matcher = CareerMatcher(self.career_db, self.llm_client)
+        self.career_db = career_db or shared_resources.get_career_database()
+        if career_matcher is None:
+            if llm_client is None and career_db is None:
+                career_matcher = shared_resources.get_career_matcher()
+            else:
+                career_matcher = CareerMatcher(self.career_db, self.llm_client)
+        self.career_matcher = career_matcher
+        # Handles simple messages ("I like coding and math") without an LLM call
+        self.profile_extractor = shared_resources.get_profile_extractor()
         self.questions_asked = 0  # Track number of questions asked
+        # Prompts see a rolling summary plus a token-budgeted window of recent messages
+        self.context = ConversationContext(
+            self.state, self.llm_client, self.session_id,
+            window_tokens=int(os.getenv("CONTEXT_WINDOW_TOKENS", "800"))
+        )
+        self._streaming = False  # Set while handling a turn for process_user_input_stream
+        
+        # Latency budget (seconds) for one turn, shared by all of its LLM calls
+        self.turn_timeout = float(os.getenv("TURN_TIMEOUT", "45"))
+        self._deadline: Optional[Deadline] = None
+        
+        # Extract the profile update and write the reply in one LLM call where the
+        # turn only needs a conversational reply; the two-call path is the fallback
+        self.combined_turns = os.getenv("COMBINED_TURNS", "true").lower() in ("1", "true", "yes")
+        # On the two-call path, start the contextual reply while extraction runs
+        self.overlap_calls = os.getenv("OVERLAP_TURN_CALLS", "true").lower() in ("1", "true", "yes")
         
     def start_conversation(self) -> str:
         """Start the career counseling conversation"""
@@ -21,31 +63,306 @@ class ConversationManager:
         greeting_prompt = self.prompt_templates.get_greeting_prompt()
         
         response = self.llm_client.generate_response_sync(
-            "Generate a warm, welcoming greeting to start a career counseling session with a student. Introduce yourself as PathFinder.",
-            greeting_prompt
+            greeting_prompt.user,
+            greeting_prompt.system,
+            session_id=self.session_id
         )
         
         self._add_to_history("assistant", response)
         return response
     
-    def process_user_input(self, user_input: str) -> str:
-        """Process user input and return appropriate response"""
+    def process_user_input(self, user_input: str, deadline: Optional[Deadline] = None) -> str:
+        """Process user input and return appropriate response
+
+        The turn's LLM calls share ``deadline`` (default: TURN_TIMEOUT seconds).
+        """
+        self._begin_turn(deadline)
+        try:
+            response = self._handle_user_input(user_input)
+        except (DeadlineExceeded, RequestCancelled) as e:
+            print(f"Turn stopped: {e}")
+            response = self._turn_timeout_response()
+        self._add_to_history("assistant", response)
+        return response
+    
+    def process_user_input_stream(self, user_input: str, deadline: Optional[Deadline] = None) -> Iterator[str]:
+        """Process user input and yield the response as it is generated
+
+        The complete response is recorded in the conversation history once the
+        stream is exhausted. Closing the generator early cancels the turn.
+        """
+        turn_deadline = self._begin_turn(deadline)
+        finished = False
+        response = None
+        try:
+            self._streaming = True
+            try:
+                response = self._handle_user_input(user_input)
+            finally:
+                self._streaming = False
+            
+            if isinstance(response, str):
+                self._add_to_history("assistant", response)
+                finished = True
+                yield response
+                return
+            
+            parts = []
+            try:
+                for chunk in response:
+                    parts.append(chunk)
+                    yield chunk
+            except (DeadlineExceeded, RequestCancelled) as e:
+                print(f"Turn stopped: {e}")
+                parts = [self._turn_timeout_response()]
+                yield parts[0]
+            self._add_to_history("assistant", "".join(parts))
+            finished = True
+        except (DeadlineExceeded, RequestCancelled) as e:
+            print(f"Turn stopped: {e}")
+            self._add_to_history("assistant", self._turn_timeout_response())
+            finished = True
+            yield self._turn_timeout_response()
+        finally:
+            if not finished:
+                # The caller stopped reading (e.g. a UI rerun); abandon the turn's calls
+                turn_deadline.cancel()
+                if response is not None and not isinstance(response, str):
+                    response.close()
+    
+    def cancel_current_turn(self):
+        """Abandon the LLM calls of the turn in progress, if any"""
+        if self._deadline is not None:
+            self._deadline.cancel()
+    
+    def _begin_turn(self, deadline: Optional[Deadline] = None) -> Deadline:
+        """Start a turn's deadline; a new turn supersedes any still running"""
+        self.cancel_current_turn()
+        self._deadline = deadline or Deadline(self.turn_timeout)
+        return self._deadline
+    
+    def _turn_timeout_response(self) -> str:
+        return "Sorry, that took longer than expected on my side. Could you send your message again?"
+    
+    def _handle_user_input(self, user_input: str) -> Union[str, Iterator[str]]:
+        """Update the profile from user input and route to the handler for the current step"""
         self._add_to_history("user", user_input)
         
-        # Extract information from the conversation
-        self._update_student_profile(user_input)
+        # Simple messages are extracted locally; the LLM is only needed for the reply
+        fast_update = self.profile_extractor.try_extract(user_input)
+        if fast_update is not None:
+            self._apply_profile_update(fast_update.model_dump())
+            return self._route(user_input)
+        
+        # Extract information from the conversation, together with the reply when possible
+        turn = None
+        if self.combined_turns and self._expects_conversational_reply(user_input):
+            if self._streaming:
+                streamed = self._run_streamed_combined_turn(user_input)
+                if streamed is not None:
+                    profile_update, reply_stream = streamed
+                    self._apply_profile_update(profile_update.model_dump())
+                    return self._route_with_reply_stream(user_input, reply_stream)
+            else:
+                turn = self._run_combined_turn(user_input)
+        if turn is not None:
+            self._apply_profile_update(turn.profile_update.model_dump())
+            text = turn.reply.strip()
+            return self._route(user_input, (lambda: text) if text else None)
+        
+        if (self.overlap_calls and self._expects_contextual_reply(user_input)
+                and _speculation_slots.acquire(blocking=False)):
+            return self._route_with_speculative_reply(user_input)
         
+        self._update_student_profile(user_input)
+        return self._route(user_input)
+    
+    def _route(self, user_input: str,
+               reply: Optional[Callable[[], Union[str, Iterator[str]]]] = None) -> Union[str, Iterator[str]]:
+        """Dispatch to the handler for the current step
+
+        ``reply`` returns a conversational reply that is already being (or has
+        been) generated; handlers call it instead of generating their own.
+        """
         # Determine next step based on current state and available information
         if self.state.current_step == "greeting":
-            return self._handle_initial_response(user_input)
+            return self._handle_initial_response(user_input, reply)
         elif self.state.current_step == "information_gathering":
-            return self._handle_information_gathering(user_input)
+            return self._handle_information_gathering(user_input, reply)
         elif self.state.current_step == "clarification":
-            return self._handle_clarification(user_input)
+            return self._handle_clarification(user_input, reply)
         elif self.state.current_step == "career_matching":
             return self._handle_career_matching()
         else:
-            return self._handle_general_response(user_input)
+            return self._handle_general_response(user_input, reply)
+    
+    def _expects_contextual_reply(self, user_input: str) -> bool:
+        """Whether this turn's handler will most likely call _generate_contextual_response"""
+        return self.state.current_step != "greeting" and self._expects_conversational_reply(user_input)
+    
+    def _route_with_speculative_reply(self, user_input: str) -> Union[str, Iterator[str]]:
+        """Extract the profile while the contextual reply is already being generated
+
+        The reply is written from the profile as it stood before this message
+        (the message itself is in the prompt), so it doesn't have to wait for
+        extraction; only routing does. If routing goes another way, e.g. to
+        recommendations, the speculative reply is abandoned. The caller holds
+        a _speculation_slots slot, which is released once the reply is done.
+        """
+        reply_deadline = self._deadline.split(1.0) if self._deadline is not None else Deadline()
+        try:
+            future = _speculation_executor.submit(self._speculate_contextual_response, user_input,
+                                                  self._get_profile_summary(), reply_deadline)
+        except BaseException:
+            _speculation_slots.release()
+            raise
+        future.add_done_callback(lambda _: _speculation_slots.release())
+        self._update_student_profile(user_input)
+        
+        used = False
+        def reply() -> Union[str, Iterator[str]]:
+            nonlocal used
+            used = True
+            return future.result()
+        
+        try:
+            return self._route(user_input, reply)
+        finally:
+            if not used:
+                reply_deadline.cancel()
+                future.add_done_callback(self._close_discarded_reply)
+    
+    def _speculate_contextual_response(self, user_input: str, profile_summary: str,
+                                       deadline: Deadline) -> Union[str, Iterator[str]]:
+        reply = self._generate_contextual_response(user_input, profile_summary, deadline)
+        if isinstance(reply, str):
+            return reply
+        # Pull the first chunk here so the request is already in flight when routing asks for it
+        first = next(reply, None)
+        return self._prepend_chunk(first, reply)
+    
+    def _prepend_chunk(self, first: Optional[str], rest: Iterator[str]) -> Iterator[str]:
+        try:
+            if first is not None:
+                yield first
+                yield from rest
+        finally:
+            rest.close()
+    
+    def _close_discarded_reply(self, future: Future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        reply = future.result()
+        if not isinstance(reply, str):
+            reply.close()
+    
+    def _expects_conversational_reply(self, user_input: str) -> bool:
+        """Whether this turn will most likely answer with a contextual reply rather than
+        recommendations or a detailed answer, which need their own LLM calls"""
+        step = self.state.current_step
+        if step == "information_gathering":
+            return self.questions_asked + 1 < 3
+        if step == "career_matching":
+            return False
+        if step not in ("greeting", "clarification"):
+            return not self._wants_details(user_input)
+        return True
+    
+    def _run_combined_turn(self, user_input: str) -> Optional[TurnResult]:
+        """Extract the profile update and write the reply with a single structured call"""
+        prompt = self._combined_turn_prompt()
+        try:
+            # Not cached, like other chat replies
+            return self.llm_client.generate_structured(prompt.user, TurnResult, prompt.system,
+                                                       session_id=self.session_id, task=TaskType.COMBINED_TURN,
+                                                       deadline=self._deadline, use_cache=False)
+        except (DeadlineExceeded, RequestCancelled):
+            raise
+        except Exception as e:
+            print(f"Error running combined turn: {e}")
+            return None
+    
+    def _combined_turn_prompt(self) -> RenderedPrompt:
+        template = self.prompt_templates.COMBINED_TURN
+        # Over budget, older conversation goes before the profile
+        profile_summary, conversation = self.llm_client.fit_prompt(
+            [PromptSection(self._get_profile_summary(), priority=2),
+             PromptSection(self._recent_conversation_text(), priority=1, keep="tail")],
+            TaskType.COMBINED_TURN, reserved_tokens=template.static_tokens
+        )
+        return template.render(
+            missing=', '.join(self._identify_missing_information()) or 'their goals or preferences',
+            profile_summary=profile_summary, conversation=conversation
+        )
+    
+    def _run_streamed_combined_turn(self, user_input: str) -> Optional[Tuple[ProfileExtraction, Optional[Iterator[str]]]]:
+        """The combined call for a streamed turn: the profile update, then the reply as it is written
+
+        The template puts "profile_update" before "reply", so the update is
+        complete (and routing can use it) by the time the reply starts; the
+        rest of the reply is streamed out of the JSON as it arrives. The reply
+        stream is None if the object ended without one. Returns None if no
+        usable profile update came back, for the two-call path to take over.
+        """
+        prompt = self._combined_turn_prompt()
+        # Streamed without JSON mode, which not every provider supports for streams
+        stream = self.llm_client.stream_response(prompt.user, prompt.system, use_cache=False,
+                                                 session_id=self.session_id, task=TaskType.COMBINED_TURN,
+                                                 deadline=self._deadline)
+        reader = StreamedObjectReader("reply")
+        pending = []
+        try:
+            for chunk in stream:
+                text = reader.feed(chunk)
+                if text:
+                    pending.append(text)
+                if reader.done or ("profile_update" in reader.members and "".join(pending).strip()):
+                    break
+            if "profile_update" not in reader.members:
+                raise ValueError("no profile_update in the reply")
+            profile_update = ProfileExtraction.model_validate(reader.members["profile_update"])
+        except (DeadlineExceeded, RequestCancelled):
+            stream.close()
+            raise
+        except Exception as e:
+            stream.close()
+            print(f"Error running combined turn: {e}")
+            return None
+        
+        first = "".join(pending).lstrip()
+        if not first:
+            stream.close()
+            return profile_update, None
+        return profile_update, self._stream_reply_field(first, reader, stream)
+    
+    def _stream_reply_field(self, first: str, reader: StreamedObjectReader, stream: Iterator[str]) -> Iterator[str]:
+        try:
+            yield first
+            for chunk in stream:
+                text = reader.feed(chunk)
+                if text:
+                    yield text
+                if reader.done:
+                    break
+        finally:
+            stream.close()
+    
+    def _route_with_reply_stream(self, user_input: str, reply_stream: Optional[Iterator[str]]) -> Union[str, Iterator[str]]:
+        """Route with a reply that is already streaming, closing it if routing goes another way"""
+        if reply_stream is None:
+            return self._route(user_input)
+        
+        used = False
+        def reply() -> Iterator[str]:
+            nonlocal used
+            used = True
+            return reply_stream
+        
+        try:
+            return self._route(user_input, reply)
+        finally:
+            if not used:
+                reply_stream.close()
     
     def _add_to_history(self, role: str, content: str):
         """Add message to conversation history"""
@@ -54,30 +371,30 @@ class ConversationManager:
             "content": content,
             "timestamp": None  # In a real app, you'd add actual timestamps
         })
+        if role == "assistant":
+            # Between turns: fold old messages into the summary if the window is full
+            self.context.refresh_summary()
+    
+    def _recent_conversation_text(self) -> str:
+        """Conversation context used for extraction: summary plus recent messages"""
+        return self.context.render()
+    
+    def _profile_schema(self) -> Dict[str, Any]:
+        """Schema for information extraction"""
+        return PROFILE_SCHEMA
     
     def _update_student_profile(self, user_input: str):
         """Extract and update student profile information from user input"""
-        # Get recent conversation context (last 4 messages)
-        recent_messages = self.state.conversation_history[-4:] if len(self.state.conversation_history) >= 4 else self.state.conversation_history
-        conversation_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in recent_messages])
-        
-        # Define schema for information extraction
-        schema = {
-            "name": "string or null",
-            "interests": ["array of strings"],
-            "hobbies": ["array of strings"],
-            "preferred_subjects": ["array of strings"],
-            "academic_scores": {"subject": "performance_level"},
-            "career_goals": "string or null",
-            "learning_style": "string or null",
-            "extracurricular_activities": ["array of strings"],
-            "work_environment_preference": "string or null"
-        }
-        
         # Extract structured information
-        extracted_info = self.llm_client.extract_structured_data(conversation_text, schema)
-        
-        # Update student profile with extracted information
+        # Extraction gets a share of the turn budget so a slow call leaves time for the reply
+        extraction_deadline = self._deadline.split(0.35) if self._deadline is not None else None
+        extracted_info = self.llm_client.extract_structured_data(self._recent_conversation_text(), self._profile_schema(),
+                                                                 session_id=self.session_id,
+                                                                 deadline=extraction_deadline, model=ProfileExtraction)
+        self._apply_profile_update(extracted_info)
+    
+    def _apply_profile_update(self, extracted_info: Dict[str, Any]):
+        """Merge extracted information into the student profile"""
         if extracted_info:
             if extracted_info.get("name") and not self.state.student_profile.name:
                 self.state.student_profile.name = extracted_info["name"]
@@ -106,18 +423,30 @@ class ConversationManager:
             if extracted_info.get("work_environment_preference") and not self.state.student_profile.work_environment_preference:
                 self.state.student_profile.work_environment_preference = extracted_info["work_environment_preference"]
     
+    def _generate_reply(self, prompt: str, system_message: str = "", use_cache: bool = True,
+                        task: TaskType = TaskType.GENERAL,
+                        deadline: Optional[Deadline] = None) -> Union[str, Iterator[str]]:
+        """Generate the reply shown to the student, streamed when the turn is streaming"""
+        deadline = deadline or self._deadline
+        if self._streaming:
+            return self.llm_client.stream_response(prompt, system_message, use_cache=use_cache,
+                                                   session_id=self.session_id, task=task,
+                                                   deadline=deadline)
+        return self.llm_client.generate_response_sync(prompt, system_message, use_cache=use_cache,
+                                                      session_id=self.session_id, task=task,
+                                                      deadline=deadline)
+    
     def _get_conversation_text(self) -> str:
-        """Get the full conversation as text"""
-        conversation_parts = []
-        for msg in self.state.conversation_history:
-            role = "Student" if msg["role"] == "user" else "PathFinder"
-            conversation_parts.append(f"{role}: {msg['content']}")
-        return "\n".join(conversation_parts)
-    
-    def _handle_initial_response(self, user_input: str) -> str:
+        """Get the conversation as text (summary of older turns plus recent messages)"""
+        return self.context.render(role_names={"user": "Student", "assistant": "PathFinder"})
+    
+    def _handle_initial_response(self, user_input: str,
+                                 reply: Optional[Callable[[], Union[str, Iterator[str]]]] = None) -> Union[str, Iterator[str]]:
         """Handle the student's initial response"""
         self.state.current_step = "information_gathering"
         self.questions_asked = 0
+        if reply is not None:
+            return reply()
         
         # Check if we have substantial information to proceed
         if self._has_substantial_information():
@@ -126,7 +455,8 @@ class ConversationManager:
         else:
             return self._ask_follow_up_questions()
     
-    def _handle_information_gathering(self, user_input: str) -> str:
+    def _handle_information_gathering(self, user_input: str,
+                                      reply: Optional[Callable[[], Union[str, Iterator[str]]]] = None) -> Union[str, Iterator[str]]:
         """Handle ongoing information gathering"""
         self.questions_asked += 1
         
@@ -135,80 +465,83 @@ class ConversationManager:
             self.state.current_step = "career_matching"
             return self._handle_career_matching()
         else:
-            return self._generate_contextual_response(user_input)
+            return reply() if reply is not None else self._generate_contextual_response(user_input)
     
-    def _handle_clarification(self, user_input: str) -> str:
+    def _handle_clarification(self, user_input: str,
+                              reply: Optional[Callable[[], Union[str, Iterator[str]]]] = None) -> Union[str, Iterator[str]]:
         """Handle clarification questions"""
-        # Update profile with clarification
-        self._update_student_profile(user_input)
-        
+        # The profile was already updated from this input by _handle_user_input
         if self._has_sufficient_information():
             self.state.current_step = "career_matching"  
             return self._handle_career_matching()
         else:
-            return self._generate_contextual_response(user_input)
+            return reply() if reply is not None else self._generate_contextual_response(user_input)
     
-    def _handle_career_matching(self) -> str:
+    def _handle_career_matching(self) -> Union[str, Iterator[str]]:
         """Generate career recommendations"""
         if not self.state.career_recommendations:
             # Generate recommendations
+            # The UIs show the top 5, so explain all of them in the (single, batched)
+            # call rather than resolving ranks 4-5 one by one while the page renders.
+            # Explanations get part of the remaining budget; presenting them needs the rest
             self.state.career_recommendations = self.career_matcher.find_matching_careers(
-                self.state.student_profile
+                self.state.student_profile,
+                explain_top_k=5,
+                session_id=self.session_id,
+                deadline=self._deadline.split(0.6) if self._deadline is not None else None
             )
         
         # Generate response with top recommendations
         return self._format_career_recommendations()
     
-    def _handle_general_response(self, user_input: str) -> str:
+    def _handle_general_response(self, user_input: str,
+                                 reply: Optional[Callable[[], Union[str, Iterator[str]]]] = None) -> Union[str, Iterator[str]]:
         """Handle general conversation"""
         # Check if they're asking about specific careers or need more details
-        if any(keyword in user_input.lower() for keyword in ['tell me more', 'details', 'how to', 'what about']):
+        if self._wants_details(user_input):
             return self._provide_detailed_response(user_input)
         
         # Generate contextual response
-        return self._generate_contextual_response(user_input)
+        return reply() if reply is not None else self._generate_contextual_response(user_input)
     
-    def _generate_contextual_response(self, user_input: str) -> str:
+    def _wants_details(self, user_input: str) -> bool:
+        return any(keyword in user_input.lower() for keyword in ['tell me more', 'details', 'how to', 'what about'])
+    
+    def _generate_contextual_response(self, user_input: str, profile_summary: Optional[str] = None,
+                                      deadline: Optional[Deadline] = None) -> Union[str, Iterator[str]]:
         """Generate a contextual response based on the conversation"""
-        profile_summary = self._get_profile_summary()
+        if profile_summary is None:
+            profile_summary = self._get_profile_summary()
         
         # Create a prompt that acknowledges their input and continues the conversation naturally
-        prompt = f"""
-        As PathFinder, a friendly AI career counselor, respond to the student's message: "{user_input}"
-        
-        Current student profile: {profile_summary}
-        
-        Guidelines:
-        1. Acknowledge what they shared with enthusiasm
-        2. Show genuine interest in their projects/experiences
-        3. If they've shared substantial information about their interests, ask ONE specific follow-up question about their goals or preferences
-        4. If you have enough information (name, interests, some background), suggest moving to career recommendations
-        5. Keep the tone conversational and encouraging
-        6. Don't ask multiple questions at once
-        7. Don't repeat information they've already provided
-        
-        Respond naturally as PathFinder would in a real conversation.
-        """
+        template = self.prompt_templates.CONTEXTUAL_RESPONSE
+        # The student's message matters more than the profile recap
+        message, profile_summary = self.llm_client.fit_prompt(
+            [PromptSection(user_input, priority=2, keep="middle"), PromptSection(profile_summary, priority=1)],
+            TaskType.FOLLOW_UP_QUESTIONS, reserved_tokens=template.static_tokens
+        )
+        prompt = template.render(profile_summary=profile_summary, message=message)
         
         try:
-            response = self.llm_client.generate_response_sync(prompt)
+            # Chat replies shouldn't repeat verbatim when a student sends the same message twice
+            response = self._generate_reply(prompt.user, prompt.system, use_cache=False,
+                                            task=TaskType.FOLLOW_UP_QUESTIONS, deadline=deadline)
             return response
+        except (DeadlineExceeded, RequestCancelled):
+            raise
         except Exception as e:
             print(f"Error generating contextual response: {e}")
             return "That's really interesting! I can see you have clear interests and passions. Would you like me to analyze your profile and suggest some career paths that might be perfect for you?"
     
-    def _provide_detailed_response(self, user_input: str) -> str:
+    def _provide_detailed_response(self, user_input: str) -> Union[str, Iterator[str]]:
         """Provide detailed response to specific questions"""
-        prompt = f"""
-        As PathFinder, the student asked: "{user_input}"
-        
-        Student profile: {self._get_profile_summary()}
-        Available recommendations: {[career.title for career in self.state.career_recommendations] if self.state.career_recommendations else 'None yet'}
-        
-        Provide a helpful, detailed response addressing their question.
-        """
+        prompt = self.prompt_templates.DETAILED_RESPONSE.render(
+            profile_summary=self._get_profile_summary(),
+            recommendations=', '.join(career.title for career in self.state.career_recommendations) or 'None yet',
+            question=user_input
+        )
         
-        return self.llm_client.generate_response_sync(prompt)
+        return self._generate_reply(prompt.user, prompt.system)
     
     def _has_substantial_information(self) -> bool:
         """Check if we have substantial information about the student"""
@@ -234,28 +567,21 @@ class ConversationManager:
         
         return has_interests and (has_academics or has_some_direction)
     
-    def _ask_follow_up_questions(self) -> str:
+    def _ask_follow_up_questions(self) -> Union[str, Iterator[str]]:
         """Generate appropriate follow-up questions"""
         missing_areas = self._identify_missing_information()
         
         if not missing_areas:
             # Use general clarifying questions
-            return self.llm_client.generate_response_sync(
-                "",
-                self.prompt_templates.get_clarifying_questions_prompt(self.state.student_profile)
-            )
+            prompt = self.prompt_templates.get_clarifying_questions_prompt(self.state.student_profile)
+            return self._generate_reply(prompt.user, prompt.system, task=TaskType.FOLLOW_UP_QUESTIONS)
         
         # Generate targeted questions for missing areas
-        prompt = f"""
-        As PathFinder, generate 1-2 friendly follow-up questions to learn more about the student's:
-        {', '.join(missing_areas)}
-        
-        Current profile: {self._get_profile_summary()}
-        
-        Make the questions conversational and engaging.
-        """
+        prompt = self.prompt_templates.FOLLOW_UP_QUESTIONS.render(
+            profile_summary=self._get_profile_summary(), missing_areas=', '.join(missing_areas)
+        )
         
-        return self.llm_client.generate_response_sync(prompt)
+        return self._generate_reply(prompt.user, prompt.system, task=TaskType.FOLLOW_UP_QUESTIONS)
     
     def _identify_missing_information(self) -> List[str]:
         """Identify what information is still missing"""
@@ -293,48 +619,51 @@ class ConversationManager:
         
         return "; ".join(summary_parts) if summary_parts else "Limited information available"
     
-    def _format_career_recommendations(self) -> str:
+    def _format_career_recommendations(self) -> Union[str, Iterator[str]]:
         """Format career recommendations into a response"""
         if not self.state.career_recommendations:
             return "I'd love to help you find great career matches, but I need a bit more information about your interests and goals first. Could you tell me more about what you enjoy doing?"
         
         top_careers = self.state.career_recommendations[:3]
-        student_name = self.state.student_profile.name or "there"
-        
-        prompt = f"""
-        As PathFinder, present these top 3 career recommendations to {student_name}:
-        
-        {self._format_careers_for_prompt(top_careers)}
-        
-        Guidelines:
-        1. Be enthusiastic and encouraging
-        2. Mention why each career matches their profile
-        3. Include key details like salary and job outlook
-        4. Ask if they'd like to know more about any specific career
-        5. Keep it conversational and personalized
+        student_name = self.state.student_profile.name or "Not provided"
         
-        Present this as a friendly career counselor would.
-        """
+        prompt = self.prompt_templates.RECOMMENDATION_PRESENTATION.render(
+            student_name=student_name, careers=self._format_careers_for_prompt(top_careers)
+        )
         
         try:
-            response = self.llm_client.generate_response_sync(prompt)
+            response = self._generate_reply(prompt.user, prompt.system, task=TaskType.RECOMMENDATION_PRESENTATION)
+            if not isinstance(response, str):
+                return self._stream_with_fallback(response, lambda: self._format_recommendations_simple(top_careers))
             return response
+        except DeadlineExceeded:
+            # Out of time: the matches are ready, so show them without the LLM write-up
+            return self._format_recommendations_simple(top_careers)
+        except RequestCancelled:
+            raise
         except Exception as e:
             print(f"Error formatting recommendations: {e}")
             # Fallback to simple formatting
             return self._format_recommendations_simple(top_careers)
     
+    def _stream_with_fallback(self, chunks: Iterator[str], fallback: Callable[[], str]) -> Iterator[str]:
+        """Yield a streamed reply, or fallback() if the deadline runs out before it starts"""
+        try:
+            yield from chunks
+        except DeadlineExceeded:
+            yield fallback()
+        finally:
+            chunks.close()
+    
     def _format_careers_for_prompt(self, careers: List[CareerPath]) -> str:
         """Format careers for LLM prompt"""
         formatted = []
         for i, career in enumerate(careers, 1):
-            formatted.append(f"""
-            {i}. {career.title} ({career.match_score:.0%} match)
-            - Description: {career.description}
-            - Salary: {career.average_salary}
-            - Job Outlook: {career.job_outlook}
-            - Why it matches: {career.explanation}
-            """)
+            formatted.append(f"""{i}. {career.title} ({career.match_score:.0%} match)
+- Description: {career.description}
+- Salary: {career.average_salary}
+- Job Outlook: {career.job_outlook}
+- Why it matches: {career.explanation}""")
         return "\n".join(formatted)
     
     def _format_recommendations_simple(self, careers: List[CareerPath]) -> str:
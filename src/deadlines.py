@@ -0,0 +1,71 @@
+import time
+import threading
+from typing import Optional
+
+class DeadlineExceeded(RuntimeError):
+    """Raised when work is started or still running after its deadline"""
+
+class RequestCancelled(RuntimeError):
+    """Raised when work is abandoned because its deadline was cancelled"""
+
+class Deadline:
+    """A time budget plus a cancellation flag, passed down through a turn's calls
+
+    ``Deadline(None)`` never expires but can still be cancelled. ``split``
+    hands a share of the remaining time to a sub-call; children are
+    cancelled together with their parent.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, parent: Optional["Deadline"] = None):
+        self.expires_at = time.monotonic() + timeout if timeout is not None else None
+        self.parent = parent
+        self._cancelled = threading.Event()
+        if parent is not None and parent.expires_at is not None:
+            self.expires_at = (parent.expires_at if self.expires_at is None
+                               else min(self.expires_at, parent.expires_at))
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None for no time limit"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check(self):
+        """Raise if the work this deadline covers should stop now"""
+        if self.cancelled:
+            raise RequestCancelled("Request was cancelled")
+        if self.expired():
+            raise DeadlineExceeded("Request deadline exceeded")
+
+    def split(self, share: float) -> "Deadline":
+        """Child deadline covering ``share`` (0-1) of the remaining time"""
+        remaining = self.remaining()
+        return Deadline(None if remaining is None else remaining * share, parent=self)
+
+    def cap(self, timeout: Optional[float]) -> Optional[float]:
+        """The smaller of ``timeout`` and the remaining time (None means unlimited)"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def sleep(self, seconds: float):
+        """Sleep up to ``seconds``, waking early (and raising) on cancel or expiry"""
+        end = time.monotonic() + seconds
+        while True:
+            self.check()
+            left = end - time.monotonic()
+            if left <= 0:
+                return
+            self._cancelled.wait(min(left, 0.1))
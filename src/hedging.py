@@ -0,0 +1,141 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Any, Hashable, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class LatencyTracker:
+    """Rolling window of recent call latencies (seconds)"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """Latency at ``percentile`` (0-100), or None with fewer than min_samples samples"""
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+class HedgedExecutor:
+    """Send a duplicate request when the first one is slower than usual
+
+    If a call has not finished after the tracked ``percentile`` latency, a
+    second identical call is started and whichever finishes first wins.
+    Hedges are capped at ``budget`` (e.g. 0.05 = 5%) of all calls.
+
+    ``fn`` is passed a callback to invoke right before the request goes out,
+    so time spent waiting beforehand (e.g. in a rate limiter queue) neither
+    counts toward the latency samples nor triggers a hedge. Latencies are
+    tracked separately per ``key``, e.g. per (model, task), since a long
+    generation on one model says nothing about a short one on another.
+    """
+
+    def __init__(self, percentile: float = 95, budget: float = 0.05, min_samples: int = 20,
+                 max_workers: int = 16, window: int = 200):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.window = window
+        self._trackers: Dict[Hashable, LatencyTracker] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def tracker(self, key: Hashable = None) -> LatencyTracker:
+        with self._lock:
+            tracker = self._trackers.get(key)
+            if tracker is None:
+                tracker = self._trackers[key] = LatencyTracker(self.window)
+            return tracker
+
+    def call(self, fn: Callable[[Callable[[], None]], T], key: Hashable = None) -> T:
+        with self._lock:
+            self.requests += 1
+
+        tracker = self.tracker(key)
+        primary_started: List[float] = []
+        primary = self._executor.submit(self._timed, fn, tracker, primary_started)
+        threshold = tracker.percentile(self.percentile, self.min_samples)
+        if threshold is None:
+            return primary.result()
+
+        # The threshold counts from when the request went out, not from submission
+        while True:
+            elapsed = time.monotonic() - primary_started[0] if primary_started else 0.0
+            done, _ = wait([primary], timeout=max(0.0, threshold - elapsed))
+            if done:
+                return primary.result()
+            if primary_started and time.monotonic() - primary_started[0] >= threshold:
+                break
+        if not self._spend_budget():
+            return primary.result()
+
+        logger.info(f"LLM call exceeded p{self.percentile:.0f} latency ({threshold:.2f}s), sending hedge")
+        hedge = self._executor.submit(self._timed, fn, tracker, [])
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The loser can't be interrupted mid-request; cancel it if it
+                    # hasn't started and let its result be discarded otherwise
+                    for other in pending:
+                        other.cancel()
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+                if first_error is None or future is primary:
+                    first_error = future.exception()
+        raise first_error
+
+    def _timed(self, fn: Callable[[Callable[[], None]], T], tracker: LatencyTracker,
+               started: List[float]) -> T:
+        result = fn(lambda: started.append(time.monotonic()))
+        if started:
+            tracker.record(time.monotonic() - started[0])
+        return result
+
+    def _spend_budget(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            trackers = dict(self._trackers)
+            stats = {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_rate": self.hedges / self.requests if self.requests else 0.0,
+                "hedge_wins": self.hedge_wins
+            }
+        stats["latency_thresholds"] = {
+            "/".join(map(str, key)) if isinstance(key, tuple) else str(key):
+                tracker.percentile(self.percentile, self.min_samples)
+            for key, tracker in trackers.items()
+        }
+        return stats
@@ -0,0 +1,258 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+class IncrementalJSONParser:
+    """Pull the first JSON object out of LLM output, fed whole or in chunks
+
+    Text before the object (preamble, code fences) is skipped, and anything
+    after its closing brace is ignored. A brace pair that turns out not to be
+    valid JSON (e.g. "{name}" in prose) is dropped and scanning resumes.
+    ``finish()`` salvages an object cut off mid-way, as with a reply that hit
+    ``max_tokens``.
+    """
+
+    def __init__(self):
+        self.result: Optional[Dict[str, Any]] = None
+        self._buffer: List[str] = []
+        self._stack: List[str] = []  # closing characters still expected
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """Consume more text; returns the object as soon as it is complete"""
+        for char in chunk:
+            if self.result is not None:
+                break
+            if not self._stack:
+                if char == "{":
+                    self._buffer = [char]
+                    self._stack = ["}"]
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._stack.append("}")
+            elif char == "[":
+                self._stack.append("]")
+            elif char in "}]":
+                if char != self._stack[-1]:
+                    self._reset()
+                    continue
+                self._stack.pop()
+                if not self._stack:
+                    self.result = _loads("".join(self._buffer))
+                    if self.result is None:
+                        self._reset()
+        return self.result
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """The parsed object, repairing a truncated one if the text ended early"""
+        if self.result is not None or not self._stack:
+            return self.result
+
+        text = "".join(self._buffer)
+        # Try the whole text first, then drop trailing members one at a time
+        cuts = [len(text)] + [index for index in range(len(text) - 1, 0, -1) if text[index] == ","][:20]
+        for cut in cuts:
+            candidate = _close(text[:cut].rstrip().rstrip(","))
+            if candidate is None:
+                continue
+            parsed = _loads(candidate)
+            if parsed is not None:
+                self.result = parsed
+                break
+        return self.result
+
+    def _reset(self):
+        self._buffer = []
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+class StreamedObjectReader:
+    """Read a JSON object's top-level members while the object is still being written
+
+    ``feed(chunk)`` returns the newly decoded text of the string member
+    ``stream_field``, so e.g. a reply can be shown as the model writes it.
+    Every top-level member is added to ``members`` as soon as its value is
+    complete. Like IncrementalJSONParser, text before the object is skipped
+    and anything after it is ignored.
+    """
+
+    def __init__(self, stream_field: str):
+        self.stream_field = stream_field
+        self.members: Dict[str, Any] = {}
+        self.field_started = False  # the stream_field value has begun
+        self.done = False           # the object has closed
+        self._started = False
+        self._raw: List[str] = []
+        self._depth = 0
+        self._expect = "key"        # at the top level: "key", "colon", "value" or "comma"
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._text: List[str] = []  # decoded current top-level string
+        self._in_string = False
+        self._escape = False
+        self._unicode: Optional[str] = None  # hex digits of a \u escape so far
+        self._high_surrogate: Optional[int] = None
+
+    def feed(self, chunk: str) -> str:
+        out: List[str] = []
+        for char in chunk:
+            if self.done:
+                break
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            self._raw.append(char)
+            if self._in_string:
+                self._string_char(char, out)
+                continue
+            top_level = self._depth == 1
+            if top_level and self._expect == "value" and self._value_start is None and not char.isspace():
+                self._value_start = len(self._raw) - 1
+
+            if char == '"':
+                self._in_string = True
+                if top_level:
+                    self._text = []
+                    if self._expect == "value" and self._key == self.stream_field:
+                        self.field_started = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._expect == "value":
+                    self._end_value(len(self._raw))
+                elif self._depth == 0:
+                    if self._expect == "value" and self._value_start is not None:
+                        self._end_value(len(self._raw) - 1)
+                    self.done = True
+            elif top_level and char == ",":
+                if self._expect == "value" and self._value_start is not None:
+                    self._end_value(len(self._raw) - 1)
+                self._expect = "key"
+            elif top_level and char == ":":
+                self._expect = "value"
+                self._value_start = None
+        return "".join(out)
+
+    def _string_char(self, char: str, out: List[str]):
+        if self._unicode is not None:
+            self._unicode += char
+            if len(self._unicode) == 4:
+                try:
+                    code = int(self._unicode, 16)
+                except ValueError:
+                    code = 0xFFFD
+                self._unicode = None
+                self._emit(self._code_point(code), out)
+        elif self._escape:
+            self._escape = False
+            if char == "u":
+                self._unicode = ""
+            else:
+                self._emit(_ESCAPES.get(char, char), out)
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            if self._depth == 1:
+                self._end_string()
+        else:
+            self._emit(char, out)
+
+    def _code_point(self, code: int) -> str:
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+            return ""
+        high, self._high_surrogate = self._high_surrogate, None
+        if high is not None and 0xDC00 <= code < 0xE000:
+            return chr(0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00))
+        return chr(code)
+
+    def _emit(self, text: str, out: List[str]):
+        if self._depth != 1:
+            return
+        self._text.append(text)
+        if self._expect == "value" and self._key == self.stream_field:
+            out.append(text)
+
+    def _end_string(self):
+        if self._expect == "key":
+            self._key = "".join(self._text)
+            self._expect = "colon"
+        elif self._expect == "value":
+            self.members[self._key] = "".join(self._text)
+            self._expect = "comma"
+            self._value_start = None
+
+    def _end_value(self, end: int):
+        try:
+            self.members[self._key] = json.loads("".join(self._raw[self._value_start:end]))
+        except json.JSONDecodeError:
+            pass
+        self._expect = "comma"
+        self._value_start = None
+
+def parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """First JSON object in text, tolerating surrounding prose and truncation"""
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.finish()
+
+def _loads(text: str) -> Optional[Dict[str, Any]]:
+    for candidate in (text, _TRAILING_COMMA.sub(r"\1", text)):
+        try:
+            parsed = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        return parsed if isinstance(parsed, dict) else None
+    return None
+
+def _close(text: str) -> Optional[str]:
+    """Append whatever closing quotes/brackets text is missing (None if it is malformed)"""
+    stack = []
+    in_string = False
+    escape = False
+    for char in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if not stack or stack.pop() != char:
+                return None
+
+    if escape:
+        text = text[:-1]
+    if in_string:
+        text += '"'
+    # A key with no value yet can't be closed into valid JSON
+    if text.rstrip().endswith(":"):
+        return None
+    return text + "".join(reversed(stack))
@@ -0,0 +1,60 @@
+from collections import deque
+from typing import Dict, List, Sequence, Set
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over a fixed keyword list
+
+    find(text) returns the index of every keyword that occurs anywhere in
+    text as a substring (the same as ``keyword in text`` for each keyword),
+    in a single pass over text regardless of how many keywords there are.
+    A keyword listed more than once reports all of its indices.
+    """
+
+    def __init__(self, keywords: Sequence[str]):
+        self.keywords = list(keywords)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(index)
+
+        # Breadth-first, so a state's failure target is finished before its children
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                # Keywords ending at the failure state also end here
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+        # The empty keyword is a substring of everything
+        self._always = list(self._output[0])
+
+    def find(self, text: str) -> Set[int]:
+        """Indices of the keywords that occur in text"""
+        found = set(self._always)
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
@@ -1,8 +1,27 @@
 import os
 import json
+import time
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from enum import Enum
+from typing import Dict, Any, List, Optional, Iterator, Callable, Tuple, Type, TypeVar
 from dotenv import load_dotenv
+from pydantic import BaseModel
+from src.response_cache import ResponseCache
+from src.resilience import ResilientCaller, CircuitBreaker, CircuitOpenError, ErrorKind, classify_error
+from src.rate_limiter import ModelRateLimiter, RequestPriority, RateLimitTimeout
+from src.single_flight import SingleFlight
+from src.hedging import HedgedExecutor
+from src.model_pool import ModelPool
+from src.deadlines import Deadline, DeadlineExceeded, RequestCancelled
+from src.json_parser import parse_json_object
+from src.models import CareerMatchAnalysis
+from src.prompt_templates import PromptTemplates
+from src.token_budget import (TokenUsageTracker, PromptSection, count_tokens, count_message_tokens,
+                               fit_sections, truncate_to_tokens)
 
 # Configure logging
 logging.basicConfig(level=logging.ERROR)
@@ -21,6 +40,25 @@ except Exception as e:
 
 load_dotenv()
 
+StructuredModel = TypeVar("StructuredModel", bound=BaseModel)
+
+class TaskType(Enum):
+    GENERAL = "general"
+    PROFILE_EXTRACTION = "profile_extraction"
+    MATCH_EXPLANATION = "match_explanation"
+    RECOMMENDATION_PRESENTATION = "recommendation_presentation"
+    FOLLOW_UP_QUESTIONS = "follow_up_questions"
+    COMBINED_TURN = "combined_turn"
+    CONVERSATION_SUMMARY = "conversation_summary"
+
+class ModelRoute(BaseModel):
+    """Model and sampling settings used for one TaskType"""
+    model: str
+    temperature: float
+    max_tokens: int
+    priority: RequestPriority = RequestPriority.INTERACTIVE
+    prompt_budget: int = 4096
+
 class LLMClient:
     def __init__(self):
         self.client = None
@@ -31,11 +69,11 @@ class LLMClient:
             # Get API key
             api_key = self._get_api_key()
             
-            # Initialize Groq client if available
+            # Initialize Groq client if available. Constructing the client does no
+            # network I/O; connectivity is probed lazily by check_connection()
             if GROQ_AVAILABLE:
-                self.client = Groq(api_key=api_key)
-                # Test connection
-                self.client.models.list(limit=1)
+                # Retries are handled by self.resilience, so disable the SDK's own
+                self.client = Groq(api_key=api_key, max_retries=0)
                 self.initialized = True
             else:
                 self.error_message = "Groq library not available"
@@ -48,6 +86,128 @@ class LLMClient:
         self.model = os.getenv("MODEL_NAME", "llama3-70b-8192")
         self.temperature = float(os.getenv("TEMPERATURE", "0.7"))
         self.max_tokens = int(os.getenv("MAX_TOKENS", "500"))
+        self.routes = self._build_routes()
+        
+        # Per-attempt HTTP timeout (seconds); a caller's Deadline can shorten it
+        self.request_timeout = float(os.getenv("LLM_TIMEOUT", "30"))
+        # Calls made under a Deadline run here so the caller can stop waiting on cancel
+        self._call_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-call")
+        
+        # Models each request can be served by, ranked per task on observed latency
+        # and error rate (see ModelPool); defaults to every model the routes use
+        route_models = ",".join(dict.fromkeys([self.model] + [route.model for route in self.routes.values()]))
+        pool_models = os.getenv("LLM_MODEL_POOL", route_models)
+        self.model_pool = ModelPool([model.strip() for model in pool_models.split(",") if model.strip()],
+                                    switch_margin=float(os.getenv("LLM_POOL_SWITCH_MARGIN", "0.2")))
+        
+        # Upper bound on concurrent async requests (per event loop)
+        self.max_concurrency = max(1, int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+        self._async_semaphores = weakref.WeakKeyDictionary()
+        self._semaphore_lock = threading.Lock()
+        
+        # In-memory response cache; LLM_CACHE=false disables it. Prompts carry
+        # student data, so persisting replies to SQLite is opt-in via LLM_CACHE_PATH
+        # (e.g. .cache/llm_responses.sqlite3) for deployments that allow it
+        self.cache = None
+        if os.getenv("LLM_CACHE", "true").lower() in ("1", "true", "yes"):
+            self.cache = ResponseCache(
+                path=os.getenv("LLM_CACHE_PATH", "") or None,
+                max_memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256")),
+                max_disk_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "86400"))
+            )
+        
+        # Retry with backoff for transient failures; fail fast while the provider is down
+        self.resilience = ResilientCaller(
+            max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", "3")),
+            base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "8")),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "5")),
+                recovery_timeout=float(os.getenv("LLM_BREAKER_RECOVERY", "30"))
+            )
+        )
+        
+        # Identical requests already in flight are shared rather than re-sent
+        self.single_flight = SingleFlight()
+        
+        # Optional hedging: duplicate a request that runs past the rolling p95
+        # latency, spending at most LLM_HEDGE_BUDGET extra requests
+        self.hedger = None
+        if os.getenv("LLM_HEDGING", "false").lower() in ("1", "true", "yes"):
+            self.hedger = HedgedExecutor(
+                percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+                budget=float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+            )
+        
+        # Client-side rate limiting shared by all sessions using this client, with
+        # separate buckets per model as providers apply their limits per model.
+        # Off by default; set the limits to match the deployment's provider tier
+        # (e.g. 30 requests and 6000 tokens per minute on Groq's free tier).
+        self.scheduler = ModelRateLimiter(
+            requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+            tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "0")),
+            max_wait=float(os.getenv("LLM_QUEUE_TIMEOUT", "60"))
+        )
+        
+        # Ask for JSON-mode completions for structured output; switched off
+        # automatically if the provider rejects the response_format parameter
+        self.json_mode = os.getenv("LLM_JSON_MODE", "true").lower() in ("1", "true", "yes")
+        self._structured_lock = threading.Lock()
+        self._structured_stats: Dict[str, Dict[str, int]] = {}
+        
+        # Prompt and completion tokens per call, rolled up per session and per task
+        self.token_usage = TokenUsageTracker()
+        # System messages seen so far, to measure how often a request reuses a cacheable prefix
+        self._prefix_lock = threading.Lock()
+        self._seen_prefixes = set()
+        self._prefix_stats = {"requests": 0, "reused": 0, "reused_tokens": 0}
+        
+        # Cached connectivity status: None until the first probe (or API call) completes
+        self.health_ttl = float(os.getenv("LLM_HEALTH_TTL", "300"))
+        self._health_lock = threading.Lock()
+        self._health_thread = None
+        self._connected = None
+        self._health_checked_at = 0.0
+        self._health_error = ""
+
+    def _build_routes(self) -> Dict[TaskType, ModelRoute]:
+        """Per-task model settings; each can be overridden with MODEL_<TASK>,
+        TEMPERATURE_<TASK>, MAX_TOKENS_<TASK> and PROMPT_BUDGET_<TASK> (e.g. MODEL_PROFILE_EXTRACTION)
+
+        The default prompt budget is whatever the context window leaves after
+        the reply's max_tokens.
+        """
+        small_model = os.getenv("SMALL_MODEL_NAME", "llama3-8b-8192")
+        context_tokens = int(os.getenv("MODEL_CONTEXT_TOKENS", "8192"))
+        defaults = {
+            TaskType.GENERAL: (self.model, self.temperature, self.max_tokens, RequestPriority.INTERACTIVE),
+            # Extraction only returns a small JSON object, so a fast 8B model is plenty
+            TaskType.PROFILE_EXTRACTION: (small_model, 0.0, 300, RequestPriority.INTERACTIVE),
+            TaskType.MATCH_EXPLANATION: (self.model, 0.5, 600, RequestPriority.BACKGROUND),
+            TaskType.RECOMMENDATION_PRESENTATION: (self.model, self.temperature, 700, RequestPriority.INTERACTIVE),
+            TaskType.FOLLOW_UP_QUESTIONS: (self.model, self.temperature, 250, RequestPriority.INTERACTIVE),
+            # Profile update JSON plus the reply text
+            TaskType.COMBINED_TURN: (self.model, self.temperature, 600, RequestPriority.INTERACTIVE),
+            # Runs in the background between turns
+            TaskType.CONVERSATION_SUMMARY: (small_model, 0.2, 400, RequestPriority.BACKGROUND),
+        }
+        
+        routes = {}
+        for task, (model, temperature, max_tokens, priority) in defaults.items():
+            suffix = task.name
+            max_tokens = int(os.getenv(f"MAX_TOKENS_{suffix}", str(max_tokens)))
+            routes[task] = ModelRoute(
+                model=os.getenv(f"MODEL_{suffix}", model),
+                temperature=float(os.getenv(f"TEMPERATURE_{suffix}", str(temperature))),
+                max_tokens=max_tokens,
+                priority=priority,
+                prompt_budget=int(os.getenv(f"PROMPT_BUDGET_{suffix}", str(context_tokens - max_tokens)))
+            )
+        return routes
+
+    def get_route(self, task: TaskType) -> ModelRoute:
+        return self.routes.get(task, self.routes[TaskType.GENERAL])
 
     def _get_api_key(self) -> str:
         """Retrieve API key from multiple sources"""
@@ -74,78 +234,612 @@ class LLMClient:
         return self.initialized
 
     def get_error(self) -> str:
-        return self.error_message
+        return self.error_message or self._health_error
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Retry, circuit breaker and rate limiter counters for monitoring"""
+        return {
+            **self.resilience.metrics(),
+            "rate_limiter": self.scheduler.stats(),
+            "single_flight": self.single_flight.stats(),
+            "hedging": self.hedger.stats() if self.hedger is not None else {"enabled": False},
+            "models": self.get_model_stats(),
+            "structured_output": self.get_structured_output_stats(),
+            "tokens": self.token_usage.stats(),
+            "prompts": self.get_prompt_stats()
+        }
 
-    async def generate_response(self, prompt: str, system_message: str = "") -> str:
+    def get_prompt_stats(self) -> Dict[str, Any]:
+        """Template render costs and how often requests repeat an already-sent system prefix"""
+        with self._prefix_lock:
+            prefix = dict(self._prefix_stats)
+        prefix["reuse_rate"] = prefix["reused"] / prefix["requests"] if prefix["requests"] else 0.0
+        return {"templates": PromptTemplates.stats(), "prefix": prefix}
+
+    def get_token_usage(self, session_id: Optional[str] = None) -> Dict[str, int]:
+        """Prompt and completion tokens spent on API calls for one session"""
+        return self.token_usage.session_totals(session_id)
+
+    def circuit_open(self) -> bool:
+        """Whether calls are currently being rejected because the provider is failing"""
+        return self.resilience.breaker.state == CircuitBreaker.OPEN
+
+    def get_structured_output_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-task structured output counters, including the extraction failure rate"""
+        with self._structured_lock:
+            return {
+                task: {**counts, "failure_rate": counts["failures"] / counts["requests"] if counts["requests"] else 0.0}
+                for task, counts in self._structured_stats.items()
+            }
+
+    def get_model_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Smoothed latency and error-rate estimates for each candidate model"""
+        return self.model_pool.snapshot()
+
+    def check_connection(self, force: bool = False) -> bool:
+        """Probe the API (blocking), reusing a cached result until it expires"""
         if not self.initialized:
-            return self._fallback_response()
+            return False
+        if not force and self._connected is not None and not self._health_expired():
+            return self._connected
         
         try:
-            messages = []
-            if system_message:
-                messages.append({"role": "system", "content": system_message})
-            messages.append({"role": "user", "content": prompt})
-
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
+            self.client.models.list(limit=1)
+            self._record_health(True)
+        except Exception as e:
+            logger.error(f"Groq connectivity check failed: {str(e)}")
+            self._record_health(False, str(e))
+        return self._connected
+
+    def start_health_check(self):
+        """Run check_connection in a background thread unless one is already running"""
+        if not self.initialized:
+            return
+        with self._health_lock:
+            if self._health_thread is not None and self._health_thread.is_alive():
+                return
+            self._health_thread = threading.Thread(
+                target=self.check_connection, kwargs={"force": True},
+                name="llm-health-check", daemon=True
             )
+            self._health_thread.start()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Cached connection status for display; never blocks on network I/O
+
+        A stale or missing status schedules a background probe, so the next
+        call reflects the fresh result.
+        """
+        if self.initialized and (self._connected is None or self._health_expired()):
+            self.start_health_check()
+        
+        return {
+            "configured": self.initialized,
+            "connected": self._connected if self.initialized else False,
+            "seconds_since_check": (time.monotonic() - self._health_checked_at
+                                    if self._health_checked_at else None),
+            "error": self.get_error()
+        }
+
+    def _health_expired(self) -> bool:
+        return time.monotonic() - self._health_checked_at > self.health_ttl
+
+    def _record_failure(self, error: Exception):
+        """Mark the provider unreachable after a failed call
 
-            return response.choices[0].message.content.strip()
+        Not when the call never reached the provider (our rate limiter timed
+        out) or the provider answered and rejected the request (a 4xx).
+        """
+        if classify_error(error) not in (ErrorKind.QUEUE_TIMEOUT, ErrorKind.CLIENT_ERROR):
+            self._record_health(False, str(error))
+
+    def _record_health(self, connected: bool, error: str = ""):
+        self._connected = connected
+        self._health_error = error
+        self._health_checked_at = time.monotonic()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the response cache"""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+
+    async def generate_response(self, prompt: str, system_message: str = "", use_cache: bool = True,
+                                session_id: Optional[str] = None,
+                                priority: Optional[RequestPriority] = None,
+                                task: TaskType = TaskType.GENERAL,
+                                deadline: Optional[Deadline] = None) -> str:
+        """Non-blocking variant of generate_response_sync for asyncio callers
+
+        The blocking HTTP call runs in a worker thread, so concurrent awaits
+        overlap their network I/O. At most ``max_concurrency`` requests run at
+        once per event loop. Pass ``use_cache=False`` for prompts whose reply
+        should not be reused. ``task`` selects the model route, ``session_id``
+        and ``priority`` (default: the route's) place the call in the rate
+        limiter's fair queue. See generate_response_sync for ``deadline``.
+        """
+        if not self.initialized:
+            return self._fallback_response()
+        
+        request = self._build_request(prompt, system_message, task)
+        priority = priority or self.get_route(task).priority
+        try:
+            async with self._get_async_semaphore():
+                return await asyncio.to_thread(self._complete_cached, request, use_cache, session_id,
+                                               priority, deadline)
+        except (DeadlineExceeded, RequestCancelled):
+            raise
         except Exception as e:
             logger.error(f"LLM request failed: {str(e)}")
+            self._record_failure(e)
             return self._fallback_response()
 
-    def generate_response_sync(self, prompt: str, system_message: str = "") -> str:
+    def generate_response_sync(self, prompt: str, system_message: str = "", use_cache: bool = True,
+                               session_id: Optional[str] = None,
+                               priority: Optional[RequestPriority] = None,
+                               task: TaskType = TaskType.GENERAL,
+                               deadline: Optional[Deadline] = None,
+                               raise_errors: bool = False) -> str:
+        """Return the reply to prompt, or a fallback message if the call fails
+
+        With a ``deadline``, each attempt's timeout is capped by the time left,
+        and DeadlineExceeded or RequestCancelled is raised once it expires or
+        is cancelled (an in-flight request is abandoned rather than awaited).
+        Callers with their own fallback pass ``raise_errors=True`` to get the
+        error instead of the fallback message.
+        """
         if not self.initialized:
+            if raise_errors:
+                raise RuntimeError(self.error_message or "LLM client not initialized")
             return self._fallback_response()
         
         try:
-            messages = []
-            if system_message:
-                messages.append({"role": "system", "content": system_message})
-            messages.append({"role": "user", "content": prompt})
-
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
-            )
-
-            return response.choices[0].message.content.strip()
+            return self._complete_cached(self._build_request(prompt, system_message, task), use_cache,
+                                         session_id, priority or self.get_route(task).priority, deadline)
+        except (DeadlineExceeded, RequestCancelled):
+            raise
         except Exception as e:
             logger.error(f"LLM request failed: {str(e)}")
+            self._record_failure(e)
+            if raise_errors:
+                raise
             return self._fallback_response()
 
+    def stream_response(self, prompt: str, system_message: str = "", use_cache: bool = True,
+                        session_id: Optional[str] = None,
+                        priority: Optional[RequestPriority] = None,
+                        task: TaskType = TaskType.GENERAL,
+                        deadline: Optional[Deadline] = None) -> Iterator[str]:
+        """Yield the reply as it is generated, chunk by chunk
+
+        Cache hits and fallbacks are yielded as a single chunk. The complete
+        reply is cached once the stream finishes. If the ``deadline`` runs out
+        mid-reply the stream is closed and the partial reply ends there;
+        before the first chunk it raises like generate_response_sync.
+        Closing the generator early also closes the HTTP stream.
+        """
+        if not self.initialized:
+            yield self._fallback_response()
+            return
+        
+        request = self._build_request(prompt, system_message, task)
+        priority = priority or self.get_route(task).priority
+        key = self._cache_key(request) if self.cache is not None and use_cache else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        
+        parts = []
+        stream = None
+        usage = None
+        estimated_tokens = self._estimate_tokens(request)
+        sent_model = request["model"]
+        
+        def attempt(model_request: Dict[str, Any]):
+            nonlocal sent_model
+            sent_model = model_request["model"]
+            return self._send(model_request, session_id, priority, deadline, stream=True,
+                              estimated_tokens=estimated_tokens)
+        
+        try:
+            stream = self._call_with_failover(request, attempt, deadline)
+            for chunk in stream:
+                if deadline is not None:
+                    deadline.check()
+                # Groq reports usage on the final chunk
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if not parts:
+                    # Match generate_response_sync, which strips the reply
+                    delta = delta.lstrip()
+                    if not delta:
+                        continue
+                parts.append(delta)
+                yield delta
+        except (DeadlineExceeded, RequestCancelled) as e:
+            logger.info(f"LLM stream stopped: {str(e)}")
+            if not parts:
+                raise
+            return
+        except Exception as e:
+            logger.error(f"LLM streaming request failed: {str(e)}")
+            self._record_failure(e)
+            if not parts:
+                yield self._fallback_response()
+            return
+        finally:
+            if stream is not None and hasattr(stream, "close"):
+                stream.close()
+            if stream is not None:
+                # Charge the rate limiter for what the stream used, not its estimate
+                prompt_tokens, completion_tokens = self._record_usage(request, session_id, usage, "".join(parts))
+                self.scheduler.settle(sent_model, estimated_tokens, prompt_tokens + completion_tokens)
+        
+        self._record_health(True)
+        response = "".join(parts).strip()
+        if key is not None and response:
+            self.cache.set(key, response)
+
+    def _build_request(self, prompt: str, system_message: str = "",
+                       task: TaskType = TaskType.GENERAL) -> Dict[str, Any]:
+        """Build the chat completion arguments shared by the sync and async paths
+
+        ``task`` is kept in the request for token accounting and stripped
+        before the API call. A prompt over the route's budget has its middle
+        cut out; callers that know which parts matter should trim first with
+        fit_prompt().
+        """
+        route = self.get_route(task)
+        system_tokens = count_message_tokens([{"content": system_message}]) if system_message else 0
+        prompt_budget = route.prompt_budget - system_tokens - count_message_tokens([{"content": ""}])
+        if count_tokens(prompt) > prompt_budget:
+            logger.warning(f"{task.value} prompt exceeds its {route.prompt_budget} token budget; trimming")
+            self.token_usage.record_trim()
+            prompt = truncate_to_tokens(prompt, prompt_budget, keep="middle")
+        
+        messages = []
+        if system_message:
+            messages.append({"role": "system", "content": system_message})
+            self._record_prefix(system_message, system_tokens)
+        messages.append({"role": "user", "content": prompt})
+        
+        return {
+            "model": route.model,
+            "messages": messages,
+            "temperature": route.temperature,
+            "max_tokens": route.max_tokens,
+            "task": task.value
+        }
+
+    def _record_prefix(self, system_message: str, tokens: int):
+        with self._prefix_lock:
+            self._prefix_stats["requests"] += 1
+            if system_message in self._seen_prefixes:
+                self._prefix_stats["reused"] += 1
+                self._prefix_stats["reused_tokens"] += tokens
+                return
+            if len(self._seen_prefixes) >= 1024:
+                # Callers passing ever-changing system messages shouldn't grow this without bound
+                self._seen_prefixes.clear()
+            self._seen_prefixes.add(system_message)
+
+    def fit_prompt(self, sections: List[PromptSection], task: TaskType = TaskType.GENERAL,
+                   reserved_tokens: int = 0) -> List[str]:
+        """Trim prompt sections, lowest priority first, to the task's prompt budget
+
+        ``reserved_tokens`` is left free for text not in ``sections`` (e.g. the
+        system message or a fixed instruction block).
+        """
+        budget = self.get_route(task).prompt_budget - reserved_tokens
+        texts = fit_sections(sections, budget)
+        if texts != [section.text for section in sections]:
+            logger.warning(f"{task.value} prompt sections exceed the token budget; trimmed lower-priority context")
+            self.token_usage.record_trim()
+        return texts
+
+    def _complete_cached(self, request: Dict[str, Any], use_cache: bool = True,
+                         session_id: Optional[str] = None,
+                         priority: RequestPriority = RequestPriority.INTERACTIVE,
+                         deadline: Optional[Deadline] = None) -> str:
+        """Serve a request from the response cache, calling the API on a miss
+
+        Concurrent misses for the same request share a single API call. Calls
+        with ``use_cache=False`` are neither cached nor shared.
+        """
+        if not use_cache:
+            return self._complete(request, session_id, priority, deadline)
+        
+        key = self._cache_key(request)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        try:
+            # The shared call runs under the first caller's deadline; later
+            # callers only wait for it as long as their own deadline allows, and
+            # run it themselves if it ended because that first caller gave up
+            return self.single_flight.do(
+                key, lambda: self._complete_and_store(key, request, session_id, priority, deadline),
+                timeout=deadline.remaining() if deadline is not None else None,
+                leader_errors=(DeadlineExceeded, RequestCancelled)
+            )
+        except TimeoutError:
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded("Request deadline exceeded")
+            raise
+
+    def _complete_and_store(self, key: str, request: Dict[str, Any], session_id: Optional[str],
+                            priority: RequestPriority, deadline: Optional[Deadline] = None) -> str:
+        response = self._complete(request, session_id, priority, deadline)
+        # Failed calls raise before reaching here, so fallbacks are never cached
+        if self.cache is not None:
+            self.cache.set(key, response)
+        return response
+
+    def _cache_key(self, request: Dict[str, Any]) -> str:
+        messages = request["messages"]
+        system_message = messages[0]["content"] if messages[0]["role"] == "system" else ""
+        response_format = request.get("extra_body", {}).get("response_format", {}).get("type", "text")
+        return ResponseCache.make_key(
+            request["model"], request["temperature"], request["max_tokens"],
+            system_message, messages[-1]["content"], response_format
+        )
+
+    def _complete(self, request: Dict[str, Any], session_id: Optional[str] = None,
+                  priority: RequestPriority = RequestPriority.INTERACTIVE,
+                  deadline: Optional[Deadline] = None) -> str:
+        """Send a chat completion request and return the reply text (blocking)"""
+        def attempt(model_request: Dict[str, Any]):
+            if self.hedger is not None:
+                return self.hedger.call(
+                    lambda on_send: self._send(model_request, session_id, priority, deadline, on_send=on_send),
+                    key=(model_request["model"], model_request.get("task", TaskType.GENERAL.value))
+                )
+            return self._send(model_request, session_id, priority, deadline)
+        
+        response = self._call_with_failover(request, attempt, deadline)
+        # A successful call doubles as a connectivity check
+        self._record_health(True)
+        return response.choices[0].message.content.strip()
+
+    def _call_with_failover(self, request: Dict[str, Any], attempt: Callable[[Dict[str, Any]], Any],
+                            deadline: Optional[Deadline] = None):
+        """Run attempt against the best candidate model, failing over to the next on error
+
+        Every candidate but the last gets a single attempt, since moving to
+        another model is itself the retry; the last one gets the full retry
+        policy. An open circuit breaker stops failover, as every model is
+        served by the same provider, and so does an expired or cancelled
+        deadline or a client error (the request itself was rejected).
+        """
+        task = request.get("task")
+        candidates = self.model_pool.candidates(request["model"], task)
+        for index, model in enumerate(candidates):
+            model_request = {**request, "model": model}
+            is_last = index == len(candidates) - 1
+            started = time.monotonic()
+            try:
+                result = self.resilience.call(lambda: attempt(model_request),
+                                              max_attempts=None if is_last else 1, deadline=deadline)
+            except (CircuitOpenError, DeadlineExceeded, RequestCancelled, RateLimitTimeout):
+                raise
+            except Exception as e:
+                if classify_error(e) == ErrorKind.CLIENT_ERROR:
+                    # A bad request (4xx other than 408/429) fails the same on every model
+                    raise
+                self.model_pool.record(model, success=False, task=task)
+                if is_last:
+                    raise
+                logger.warning(f"Model {model} failed, failing over to {candidates[index + 1]}: {str(e)}")
+                continue
+            
+            self.model_pool.record(model, success=True, latency=time.monotonic() - started, task=task)
+            return result
+
+    def _send(self, request: Dict[str, Any], session_id: Optional[str],
+              priority: RequestPriority, deadline: Optional[Deadline] = None, stream: bool = False,
+              on_send: Optional[Callable[[], None]] = None, estimated_tokens: Optional[int] = None):
+        """Make one API attempt once the rate limiter admits it
+
+        ``on_send`` is called once admitted, right before the request goes out.
+        """
+        if estimated_tokens is None:
+            estimated_tokens = self._estimate_tokens(request)
+        api_request = {key: value for key, value in request.items() if key != "task"}
+        timeout = self.request_timeout
+        if deadline is not None:
+            deadline.check()
+            timeout = deadline.cap(timeout)
+        
+        try:
+            self.scheduler.acquire(request["model"], session_id, priority, estimated_tokens, timeout=timeout)
+        except RateLimitTimeout:
+            if deadline is not None:
+                deadline.check()
+            raise
+        if on_send is not None:
+            on_send()
+        
+        if stream:
+            return self._run_until_deadline(
+                lambda: self.client.chat.completions.create(**api_request, stream=True, timeout=timeout), deadline
+            )
+        
+        response = self._run_until_deadline(
+            lambda: self.client.chat.completions.create(**api_request, timeout=timeout), deadline
+        )
+        usage = getattr(response, "usage", None)
+        self.scheduler.settle(request["model"], estimated_tokens, getattr(usage, "total_tokens", None))
+        self._record_usage(request, session_id, usage, response.choices[0].message.content or "")
+        return response
+
+    def _record_usage(self, request: Dict[str, Any], session_id: Optional[str], usage: Any,
+                      completion: str) -> Tuple[int, int]:
+        """Account one API call's (prompt, completion) tokens, using the provider's counts when it reports them"""
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        if prompt_tokens is None:
+            prompt_tokens = count_message_tokens(request["messages"])
+        if completion_tokens is None:
+            completion_tokens = count_tokens(completion)
+        # Prompt tokens the provider served from its prefix cache, if it reports them
+        cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None) or 0
+        self.token_usage.record(session_id, request.get("task", TaskType.GENERAL.value),
+                                prompt_tokens, completion_tokens, cached_tokens)
+        return prompt_tokens, completion_tokens
+
+    def _run_until_deadline(self, fn: Callable[[], Any], deadline: Optional[Deadline]):
+        """Run a blocking call, giving up on it once the deadline expires or is cancelled
+
+        The HTTP request itself can't be interrupted from another thread; an
+        abandoned call finishes in the background (bounded by its timeout)
+        and its result is discarded.
+        """
+        if deadline is None:
+            return fn()
+        
+        future = self._call_executor.submit(fn)
+        while True:
+            try:
+                return future.result(timeout=0.1)
+            except FutureTimeoutError:
+                try:
+                    deadline.check()
+                except (DeadlineExceeded, RequestCancelled):
+                    future.cancel()
+                    raise
+
+    def _estimate_tokens(self, request: Dict[str, Any]) -> int:
+        """Tokens a request is expected to use: the prompt estimate plus the task's average reply
+
+        Before a task has any calls, half its max_tokens stands in for the
+        reply. The rate limiter is settled with the real usage afterwards.
+        """
+        expected = self.token_usage.average_completion_tokens(request.get("task", TaskType.GENERAL.value))
+        if expected is None:
+            expected = request["max_tokens"] / 2
+        return count_message_tokens(request["messages"]) + int(min(expected, request["max_tokens"]))
+
+    def _get_async_semaphore(self) -> asyncio.Semaphore:
+        """Concurrency gate for async requests, one per running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._semaphore_lock:
+            semaphore = self._async_semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._async_semaphores[loop] = semaphore
+            return semaphore
+
     def _fallback_response(self) -> str:
         return "I'm having trouble connecting to the career counseling service. Please try again later or contact support."
 
-    def extract_structured_data(self, text: str, schema: Dict[str, Any]) -> Dict[str, Any]:
-        prompt = f"""
-        Extract the following information from the text below and return it as JSON:
+    def generate_structured(self, prompt: str, model: Type[StructuredModel], system_message: str = "",
+                            session_id: Optional[str] = None, task: TaskType = TaskType.GENERAL,
+                            deadline: Optional[Deadline] = None, use_cache: bool = True) -> Optional[StructuredModel]:
+        """Ask for a JSON object and validate it against ``model``
+
+        Uses the provider's JSON mode when available and a tolerant parser on
+        the reply either way. A reply that doesn't parse or validate gets one
+        repair request quoting the error. Returns None if that fails too.
+        """
+        if not self.initialized:
+            return None
+        
+        self._count_structured(task, "requests")
+        priority = self.get_route(task).priority
+        request = self._build_request(prompt, system_message, task)
+        try:
+            response = self._complete_json(request, session_id, priority, deadline, use_cache=use_cache)
+            try:
+                return self._parse_structured(response, model)
+            except ValueError as e:
+                error = e
+            
+            self._count_structured(task, "repairs")
+            repair_prompt = f"""
+            Your previous answer could not be used:
 
-        Schema: {json.dumps(schema, indent=2)}
+            {response}
 
-        Text: {text}
+            Problem: {str(error)[:500]}
 
-        Return only valid JSON that matches the schema. If information is not available, use null or empty arrays as appropriate.
-        """
+            Return only the corrected JSON object for the original request:
+            {prompt}
+            """
+            repair_request = self._build_request(repair_prompt, system_message, task)
+            response = self._complete_json(repair_request, session_id, priority, deadline, use_cache=False)
+            return self._parse_structured(response, model)
+        except Exception as e:
+            logger.warning(f"Structured {task.value} output failed: {str(e)}")
+            self._count_structured(task, "failures")
+            if isinstance(e, (DeadlineExceeded, RequestCancelled)):
+                raise
+            return None
+
+    def _complete_json(self, request: Dict[str, Any], session_id: Optional[str], priority: RequestPriority,
+                       deadline: Optional[Deadline] = None, use_cache: bool = True) -> str:
+        """Complete a request in JSON mode if the provider supports it, plain otherwise"""
+        if self.json_mode:
+            # Passed as extra_body so it works with SDK versions that predate the parameter
+            json_request = {**request, "extra_body": {"response_format": {"type": "json_object"}}}
+            try:
+                return self._complete_cached(json_request, use_cache, session_id, priority, deadline)
+            except (DeadlineExceeded, RequestCancelled, CircuitOpenError):
+                raise
+            except Exception as e:
+                if classify_error(e) != ErrorKind.CLIENT_ERROR:
+                    raise
+                if "response_format" in str(e).lower():
+                    logger.warning("Provider rejected JSON mode; using plain completions for structured output")
+                    self.json_mode = False
+                # Otherwise the model's output failed the provider's JSON check; try without it
+        return self._complete_cached(request, use_cache, session_id, priority, deadline)
+
+    def _parse_structured(self, response: str, model: Type[StructuredModel]) -> StructuredModel:
+        data = parse_json_object(response)
+        if data is None:
+            raise ValueError("Response did not contain a JSON object")
+        # pydantic's ValidationError is a ValueError
+        return model.model_validate(data)
+
+    def _count_structured(self, task: TaskType, counter: str):
+        with self._structured_lock:
+            counts = self._structured_stats.setdefault(task.value, {"requests": 0, "repairs": 0, "failures": 0})
+            counts[counter] += 1
+
+    def extract_structured_data(self, text: str, schema: Dict[str, Any],
+                                session_id: Optional[str] = None,
+                                deadline: Optional[Deadline] = None,
+                                model: Optional[Type[BaseModel]] = None) -> Dict[str, Any]:
+        """Extract ``schema`` fields from text; validated against ``model`` when given, {} on failure"""
+        # Instructions and schema go in the system message so repeated extractions share a prefix
+        system_message = f"""Extract the following information from the text you are given and return it as JSON.
+
+Schema: {json.dumps(schema, indent=2)}
+
+Return only valid JSON that matches the schema. If information is not available, use null or empty arrays as appropriate."""
+
+        # Keep the end of an over-long text: in a conversation that's the newest part
+        text, = self.fit_prompt([PromptSection(text, priority=0, keep="tail")], TaskType.PROFILE_EXTRACTION,
+                                reserved_tokens=count_message_tokens([{"content": system_message}, {"content": ""}]))
+        prompt = f"Text: {text}"
 
         try:
-            response = self.generate_response_sync(prompt)
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            if start_idx != -1 and end_idx != -1:
-                json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
-            else:
-                return {}
-        except (json.JSONDecodeError, Exception) as e:
+            result = self.generate_structured(prompt, model or _AnyObject, system_message, session_id=session_id,
+                                              task=TaskType.PROFILE_EXTRACTION, deadline=deadline)
+        except Exception as e:
             print(f"Error extracting structured data: {e}")
             return {}
+        if result is None:
+            return {}
+        return result.model_dump() if model is not None else result.model_extra or {}
 
     def analyze_career_match(self, student_info: str, career_info: str) -> Dict[str, Any]:
         prompt = f"""
@@ -168,15 +862,9 @@ class LLMClient:
         Match score should be between 0.0 and 1.0.
         """
 
-        response = self.generate_response_sync(prompt)
-        try:
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            if start_idx != -1 and end_idx != -1:
-                json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
-        except (json.JSONDecodeError, Exception):
-            pass
+        analysis = self.generate_structured(prompt, CareerMatchAnalysis, task=TaskType.MATCH_EXPLANATION)
+        if analysis is not None:
+            return analysis.model_dump()
 
         return {
             "match_score": 0.5,
@@ -184,3 +872,6 @@ class LLMClient:
             "strengths": [],
             "considerations": []
         }
+
+class _AnyObject(BaseModel, extra="allow"):
+    """Accepts any JSON object; used when no schema model is given"""
@@ -0,0 +1,93 @@
+import time
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+class _ModelStats:
+    def __init__(self):
+        self.error_rate = 0.0  # EWMA of failures (0-1), decays while idle
+        self.updated = time.monotonic()
+        self.requests = 0
+        self.failures = 0
+
+class ModelPool:
+    """Latency and error-rate estimates used to rank the models tried for a request
+
+    Latency is an EWMA per (model, task), since one model's speed on short
+    extractions says little about its speed on long replies. Error rate is an
+    EWMA per model (outages hit a model, not a task) and decays with
+    ``error_half_life`` so a model that failed earlier gets another chance.
+
+    Each candidate is scored ``latency * (1 + error_penalty * error_rate)``.
+    A model with no latency sample for the task yet borrows the routed
+    model's (or, if that has none either, the mean of those measured), so it
+    ranks on errors alone until it has been measured. The routed model stays
+    first unless another scores better by more than ``switch_margin`` (e.g.
+    0.2 = 20%), so routing isn't undone by noise.
+    """
+
+    def __init__(self, models: List[str], alpha: float = 0.3, error_penalty: float = 4.0,
+                 switch_margin: float = 0.2, error_half_life: float = 60.0):
+        self.models = list(dict.fromkeys(models))
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self.switch_margin = switch_margin
+        self.error_half_life = error_half_life
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _ModelStats] = {model: _ModelStats() for model in self.models}
+        self._latency: Dict[Tuple[str, Optional[str]], float] = {}
+
+    def candidates(self, preferred: str, task: Optional[str] = None) -> List[str]:
+        """Models to try for a ``task`` request whose route prefers ``preferred``, best first"""
+        ordered = list(dict.fromkeys([preferred] + self.models))
+        with self._lock:
+            now = time.monotonic()
+            known = [self._latency[(model, task)] for model in ordered if (model, task) in self._latency]
+            base = self._latency.get((preferred, task), sum(known) / len(known) if known else 1.0)
+            scores = {
+                model: self._latency.get((model, task), base) *
+                       (1 + self.error_penalty * self._error_rate(model, now))
+                for model in ordered
+            }
+        # The routed model's lead: others must beat it by switch_margin to go first
+        scores[preferred] *= 1 - self.switch_margin
+        # Stable sort, so ties keep the routed model first and the configured order after it
+        return sorted(ordered, key=lambda model: scores[model])
+
+    def record(self, model: str, success: bool, latency: Optional[float] = None, task: Optional[str] = None):
+        with self._lock:
+            stats = self._stats.setdefault(model, _ModelStats())
+            now = time.monotonic()
+            stats.error_rate = self._decayed_error_rate(stats, now)
+            stats.updated = now
+            stats.requests += 1
+
+            stats.error_rate += self.alpha * ((0.0 if success else 1.0) - stats.error_rate)
+            if success and latency is not None:
+                previous = self._latency.get((model, task))
+                self._latency[(model, task)] = latency if previous is None else (
+                    previous + self.alpha * (latency - previous)
+                )
+            if not success:
+                stats.failures += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current estimates per model, for dashboards"""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                model: {
+                    "ewma_latency": {task or "default": latency for (name, task), latency in self._latency.items()
+                                     if name == model},
+                    "error_rate": self._decayed_error_rate(stats, now),
+                    "requests": stats.requests,
+                    "failures": stats.failures
+                }
+                for model, stats in self._stats.items()
+            }
+
+    def _error_rate(self, model: str, now: float) -> float:
+        stats = self._stats.get(model)
+        return self._decayed_error_rate(stats, now) if stats is not None else 0.0
+
+    def _decayed_error_rate(self, stats: _ModelStats, now: float) -> float:
+        return stats.error_rate * 0.5 ** ((now - stats.updated) / self.error_half_life)
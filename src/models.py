@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, PrivateAttr, RootModel, field_validator
+from typing import List, Optional, Dict, Any, Callable
 from enum import Enum
 
 class InterestCategory(Enum):
@@ -46,12 +46,74 @@ class CareerPath(BaseModel):
     match_score: float = Field(ge=0.0, le=1.0)
     explanation: str
 
+    # Deferred explanation for results ranked outside the explained top-k
+    _explanation_loader: Optional[Callable[[], Optional[str]]] = PrivateAttr(default=None)
+    _explanation_fallback: Optional[Callable[[], str]] = PrivateAttr(default=None)
+
+    def set_explanation_loader(self, loader: Callable[[], Optional[str]],
+                               fallback: Optional[Callable[[], str]] = None) -> None:
+        """Attach a callable that produces the explanation on first access
+
+        If the loader returns None (its LLM call failed), ``fallback`` supplies
+        a template explanation instead, flagged degraded with the loader kept
+        as its upgrader.
+        """
+        self._explanation_loader = loader
+        self._explanation_fallback = fallback
+
+    @property
+    def has_pending_explanation(self) -> bool:
+        return self._explanation_loader is not None
+
+    def resolve_explanation(self) -> str:
+        """Generate the deferred explanation (once) and return it"""
+        if self._explanation_loader is not None:
+            loader, fallback = self._explanation_loader, self._explanation_fallback
+            self._explanation_loader = self._explanation_fallback = None
+            explanation = loader()
+            if explanation:
+                self.explanation = explanation
+            elif fallback is not None:
+                self.set_degraded_explanation(fallback(), loader)
+        return self.explanation
+
+    # Set when the explanation is a quick template used instead of an LLM call
+    _explanation_degraded: bool = PrivateAttr(default=False)
+    _explanation_upgrader: Optional[Callable[[], Optional[str]]] = PrivateAttr(default=None)
+
+    def set_degraded_explanation(self, explanation: str, upgrader: Optional[Callable[[], Optional[str]]] = None) -> None:
+        """Use a template explanation, keeping a callable that produces the full one"""
+        self.explanation = explanation
+        self._explanation_degraded = True
+        self._explanation_upgrader = upgrader
+
+    @property
+    def explanation_degraded(self) -> bool:
+        return self._explanation_degraded
+
+    def upgrade_explanation(self) -> str:
+        """Replace a degraded explanation with the full one and return it
+
+        The upgrader returns None when the LLM didn't produce an explanation;
+        the template then stays, still flagged degraded, and can be retried.
+        """
+        if self._explanation_upgrader is not None:
+            explanation = self._explanation_upgrader()
+            if explanation:
+                self.explanation = explanation
+                self._explanation_degraded = False
+                self._explanation_upgrader = None
+        return self.explanation
+
 class ConversationState(BaseModel):
     current_step: str = "greeting"
     student_profile: StudentProfile = Field(default_factory=StudentProfile)
     missing_info: List[str] = Field(default_factory=list)
     career_recommendations: List[CareerPath] = Field(default_factory=list)
     conversation_history: List[Dict[str, Any]] = Field(default_factory=list)
+    # Rolling summary of conversation_history[:summarized_messages]
+    conversation_summary: str = ""
+    summarized_messages: int = 0
     
 class CareerSuggestion(BaseModel):
     title: str
@@ -70,3 +132,65 @@ class CareerSuggestion(BaseModel):
     education_path: str
     experience_required: str
     key_skills: List[Dict[str, Any]]
+
+class ProfileExtraction(BaseModel):
+    """Profile fields the LLM extracts from the conversation"""
+    name: Optional[str] = None
+    interests: List[str] = Field(default_factory=list)
+    hobbies: List[str] = Field(default_factory=list)
+    preferred_subjects: List[str] = Field(default_factory=list)
+    academic_scores: Dict[str, str] = Field(default_factory=dict)
+    career_goals: Optional[str] = None
+    learning_style: Optional[str] = None
+    extracurricular_activities: List[str] = Field(default_factory=list)
+    work_environment_preference: Optional[str] = None
+
+    @field_validator("interests", "hobbies", "preferred_subjects", "extracurricular_activities", mode="before")
+    @classmethod
+    def _coerce_list(cls, value: Any) -> List[str]:
+        # Models often answer null or a bare string where a list is expected
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        return [str(item).strip() for item in value if item is not None and str(item).strip()]
+
+    @field_validator("academic_scores", mode="before")
+    @classmethod
+    def _coerce_scores(cls, value: Any) -> Dict[str, str]:
+        if not isinstance(value, dict):
+            return {}
+        return {str(subject): str(level) for subject, level in value.items() if level is not None}
+
+    @field_validator("name", "career_goals", "learning_style", "work_environment_preference", mode="before")
+    @classmethod
+    def _coerce_text(cls, value: Any) -> Optional[str]:
+        if value is None or isinstance(value, (list, dict)):
+            return None
+        value = str(value).strip()
+        return value if value and value.lower() not in ("null", "none", "n/a") else None
+
+class TurnResult(BaseModel):
+    """Profile update and assistant reply produced by one combined LLM call"""
+    profile_update: ProfileExtraction = Field(default_factory=ProfileExtraction)
+    reply: str
+
+class ConversationSummary(BaseModel):
+    summary: str
+
+class MatchExplanations(RootModel[Dict[str, str]]):
+    """Career title -> explanation, from one batched LLM call"""
+
+    @field_validator("root", mode="before")
+    @classmethod
+    def _drop_non_text(cls, value: Any) -> Any:
+        # A career the model answered with null or a nested object just gets no explanation
+        if not isinstance(value, dict):
+            return value
+        return {str(title): text for title, text in value.items() if isinstance(text, str)}
+
+class CareerMatchAnalysis(BaseModel):
+    match_score: float = Field(ge=0.0, le=1.0)
+    explanation: str
+    strengths: List[str] = Field(default_factory=list)
+    considerations: List[str] = Field(default_factory=list)
@@ -0,0 +1,93 @@
+import re
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from src.models import ProfileExtraction
+from src.vocabulary import INTEREST_MAPPINGS, TECH_KEYWORDS, CREATIVE_KEYWORDS, SUBJECTS
+
+# Words that carry no profile information of their own
+_FILLER_WORDS = {
+    "i", "im", "i'm", "ive", "i've", "me", "my", "mine", "a", "an", "the", "and", "or", "also", "too",
+    "really", "very", "so", "much", "lot", "lots", "like", "love", "enjoy", "into", "am", "is", "are",
+    "be", "been", "it", "its", "to", "in", "of", "on", "at", "for", "with", "about", "as", "well",
+    "interested", "passionate", "favorite", "favourite", "subject", "subjects", "hobby", "hobbies",
+    "school", "class", "classes", "good", "great", "but", "all", "fun", "free", "spare", "time",
+    "doing", "do", "things", "stuff", "name", "call", "hi", "hello", "hey", "yes", "yeah", "sure",
+    "ok", "okay", "mostly", "especially", "quite", "pretty", "some", "bit", "kind", "sort", "that",
+    "this", "there", "here", "was", "were", "learning"
+}
+
+# Only phrases that introduce a name; "I am ..." / "This is ..." are as often
+# followed by an adjective or a topic ("I am Confused", "This is Python")
+_NAME_PATTERN = re.compile(r"\b(?:[Mm]y name is|[Cc]all me)\s+([A-Z][a-z]+)\b")
+_WORD_PATTERN = re.compile(r"[a-z][a-z']*")
+
+class RuleBasedExtractor:
+    """Fast local profile extraction from a single message, with a confidence score
+
+    Matches the shared interest vocabulary, school subjects and simple name
+    phrases ("my name is ..."). Confidence is the share of the message's
+    informative words that were accounted for, so "I like coding, math and
+    drawing" scores 1.0 while anything with goals, experiences or unknown
+    terms scores low and should go to the LLM extractor.
+    """
+
+    def __init__(self, min_confidence: float = 0.8):
+        self.min_confidence = min_confidence
+        self._subjects = set(SUBJECTS)
+        self._interests = set(INTEREST_MAPPINGS) | set(TECH_KEYWORDS) | set(CREATIVE_KEYWORDS)
+        phrases = sorted(self._interests | self._subjects, key=len, reverse=True)
+        # Longest phrases first so "machine learning" wins over shorter overlaps
+        self._phrase_pattern = re.compile(r"\b(?:" + "|".join(re.escape(phrase) for phrase in phrases) + r")\b")
+
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.fast_path_turns = 0
+
+    def extract(self, message: str) -> Tuple[ProfileExtraction, float]:
+        """Profile fields found in message and the confidence (0-1) that nothing was missed"""
+        lowered = message.lower()
+        update: Dict[str, Any] = {"interests": [], "preferred_subjects": []}
+        covered: List[Tuple[int, int]] = []
+
+        for match in self._phrase_pattern.finditer(lowered):
+            phrase = match.group(0)
+            # A subject that is also an interest keyword (e.g. "math") counts as both
+            for field, vocabulary in (("interests", self._interests), ("preferred_subjects", self._subjects)):
+                if phrase in vocabulary and phrase not in update[field]:
+                    update[field].append(phrase)
+            covered.append(match.span())
+
+        name_match = _NAME_PATTERN.search(message)
+        if name_match and not self._is_vocabulary(name_match.group(1).lower()):
+            update["name"] = name_match.group(1)
+            covered.append(name_match.span(1))
+
+        informative = [word for word in _WORD_PATTERN.finditer(lowered) if word.group(0) not in _FILLER_WORDS]
+        if not covered or not informative:
+            return ProfileExtraction.model_validate(update), 0.0
+
+        explained = sum(1 for word in informative
+                        if any(start <= word.start() and word.end() <= end for start, end in covered))
+        return ProfileExtraction.model_validate(update), explained / len(informative)
+
+    def _is_vocabulary(self, word: str) -> bool:
+        """Whether word is a known term rather than a name ("call me Curious", "my name is Art")"""
+        return word in _FILLER_WORDS or word in self._interests or word in self._subjects
+
+    def try_extract(self, message: str) -> Optional[ProfileExtraction]:
+        """The extracted fields if confidence is high enough, else None (use the LLM)"""
+        update, confidence = self.extract(message)
+        served = confidence >= self.min_confidence
+        with self._lock:
+            self.turns += 1
+            if served:
+                self.fast_path_turns += 1
+        return update if served else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "fast_path_turns": self.fast_path_turns,
+                "fast_path_fraction": self.fast_path_turns / self.turns if self.turns else 0.0
+            }
@@ -1,11 +1,79 @@
-from typing import Dict, List
+import json
+import threading
+import time
+from string import Formatter
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
 from src.models import StudentProfile
+from src.token_budget import count_tokens, MESSAGE_OVERHEAD_TOKENS
 
-class PromptTemplates:
-    @staticmethod
-    def get_greeting_prompt() -> str:
-        return """You are PathFinder, a friendly and knowledgeable AI career counselor helping students discover their ideal career paths. 
+# Shared start of every system message, so all prompts have a common cacheable prefix
+PERSONA = """You are PathFinder, a friendly and knowledgeable AI career counselor helping students discover their ideal career paths. You are warm, encouraging and specific, and you never invent facts about the student."""
+
+# Fields the LLM extracts into a profile update
+PROFILE_SCHEMA = {
+    "name": "string or null",
+    "interests": ["array of strings"],
+    "hobbies": ["array of strings"],
+    "preferred_subjects": ["array of strings"],
+    "academic_scores": {"subject": "performance_level"},
+    "career_goals": "string or null",
+    "learning_style": "string or null",
+    "extracurricular_activities": ["array of strings"],
+    "work_environment_preference": "string or null"
+}
+
+class RenderedPrompt(NamedTuple):
+    system: str  # static for a given template
+    user: str    # the variable content
+
+class PromptTemplate:
+    """A prompt split into a static system message and a user message with placeholders
+
+    The system message (PERSONA plus the task instructions) is built once and
+    sent byte-identical on every call, so providers that cache prompt
+    prefixes can reuse it across students. Only the user message varies; its
+    template is parsed once into literal segments and placeholder names, and
+    rendering just concatenates them.
+    """
+
+    def __init__(self, name: str, instructions: str, user_template: str):
+        self.name = name
+        self.system = f"{PERSONA}\n\n{instructions.strip()}"
+        self._segments: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in Formatter().parse(user_template.strip())
+        ]
+        self.fields = [field for _, field in self._segments if field]
+        literal_text = "".join(literal for literal, _ in self._segments)
+        # Tokens the prompt costs before any variable content is added
+        self.static_tokens = count_tokens(self.system) + count_tokens(literal_text) + 2 * MESSAGE_OVERHEAD_TOKENS
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.render_ns = 0
 
+    def render(self, **values: Any) -> RenderedPrompt:
+        started = time.perf_counter_ns()
+        parts = []
+        for literal, field in self._segments:
+            parts.append(literal)
+            if field:
+                parts.append(str(values[field]))
+        user = "".join(parts)
+        elapsed = time.perf_counter_ns() - started
+        with self._lock:
+            self.renders += 1
+            self.render_ns += elapsed
+        return RenderedPrompt(self.system, user)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "renders": self.renders,
+                "avg_render_us": self.render_ns / self.renders / 1000 if self.renders else 0.0,
+                "static_tokens": self.static_tokens
+            }
+
+class PromptTemplates:
+    GREETING = PromptTemplate("greeting", """
 Your goal is to have a natural conversation to learn about the student's:
 - Interests and hobbies
 - Academic strengths and performance
@@ -15,14 +83,11 @@ Your goal is to have a natural conversation to learn about the student's:
 - Work environment preferences
 - Extracurricular activities
 
-Start by greeting the student warmly as PathFinder and asking for their name and a bit about themselves. Keep the conversation natural and encouraging."""
+Start by greeting the student warmly as PathFinder and asking for their name and a bit about themselves. Keep the conversation natural and encouraging.""", """
+Generate a warm, welcoming greeting to start a career counseling session with a student. Introduce yourself as PathFinder.""")
 
-    @staticmethod
-    def get_interest_extraction_prompt(conversation_history: str) -> str:
-        return f"""Based on the following conversation with a student, extract their interests, hobbies, and preferences:
-
-Conversation:
-{conversation_history}
+    INTEREST_EXTRACTION = PromptTemplate("interest_extraction", """
+Based on a conversation with a student, extract their interests, hobbies, and preferences.
 
 Please identify and categorize the following information:
 1. Personal interests (what they enjoy doing)
@@ -33,23 +98,12 @@ Please identify and categorize the following information:
 6. Learning style preferences
 7. Extracurricular activities
 
-Format your response as a structured analysis that can be used for career matching."""
-
-    @staticmethod
-    def get_clarifying_questions_prompt(student_profile: StudentProfile) -> str:
-        profile_summary = f"""
-Current student profile:
-- Name: {student_profile.name or 'Not provided'}
-- Interests: {', '.join(student_profile.interests) if student_profile.interests else 'Not provided'}
-- Hobbies: {', '.join(student_profile.hobbies) if student_profile.hobbies else 'Not provided'}
-- Preferred subjects: {', '.join(student_profile.preferred_subjects) if student_profile.preferred_subjects else 'Not provided'}
-- Academic performance: {student_profile.academic_scores if student_profile.academic_scores else 'Not provided'}
-- Career goals: {student_profile.career_goals or 'Not provided'}
-"""
-        
-        return f"""As PathFinder, based on this student profile, generate 2-3 thoughtful follow-up questions to better understand their career preferences:
+Format your response as a structured analysis that can be used for career matching.""", """
+Conversation:
+{conversation_history}""")
 
-{profile_summary}
+    CLARIFYING_QUESTIONS = PromptTemplate("clarifying_questions", """
+Based on the student profile you are given, generate 2-3 thoughtful follow-up questions to better understand their career preferences.
 
 The questions should:
 1. Fill in missing information gaps
@@ -58,43 +112,27 @@ The questions should:
 4. Be conversational and engaging
 5. Focus on areas that would help with career matching
 
-Provide the questions in a natural, encouraging tone as PathFinder."""
-
-    @staticmethod
-    def get_career_matching_prompt(student_profile: StudentProfile, available_careers: List[str]) -> str:
-        profile_text = f"""
-Student Profile:
-- Interests: {', '.join(student_profile.interests)}
-- Hobbies: {', '.join(student_profile.hobbies)}
-- Strong subjects: {', '.join(student_profile.preferred_subjects)}
-- Academic performance: {student_profile.academic_scores}
-- Career aspirations: {student_profile.career_goals}
-- Learning style: {student_profile.learning_style}
-- Activities: {', '.join(student_profile.extracurricular_activities)}
-- Work preference: {student_profile.work_environment_preference}
-"""
-        
-        careers_list = '\n'.join([f"- {career}" for career in available_careers])
-        
-        return f"""As PathFinder, based on this student profile, analyze and rank the following careers by compatibility:
-
-{profile_text}
+Provide the questions in a natural, encouraging tone as PathFinder.""", """
+Current student profile:
+{profile_summary}""")
 
-Available careers:
-{careers_list}
+    CAREER_MATCHING = PromptTemplate("career_matching", """
+Based on the student profile you are given, analyze and rank the available careers by compatibility.
 
 For each career, provide:
 1. A match score from 0.0 to 1.0 (1.0 being perfect match)
 2. A brief explanation of why this career matches or doesn't match the student's profile
 3. Consider their interests, academic strengths, personality traits, and stated preferences
 
-Format the response as a ranked list with scores and explanations."""
+Format the response as a ranked list with scores and explanations.""", """
+Student Profile:
+{profile_text}
 
-    @staticmethod
-    def get_career_explanation_prompt(career_title: str, student_name: str, match_reasons: str) -> str:
-        return f"""As PathFinder, create a personalized, encouraging explanation for why {career_title} is a good career match for {student_name}.
+Available careers:
+{careers_list}""")
 
-Match reasons: {match_reasons}
+    CAREER_EXPLANATION = PromptTemplate("career_explanation", """
+Create a personalized, encouraging explanation for why a career is a good match for the student.
 
 The explanation should:
 1. Be personal and encouraging
@@ -104,11 +142,13 @@ The explanation should:
 5. Be inspiring but realistic
 6. Keep it concise (2-3 paragraphs maximum)
 
-Write in a warm, mentoring tone as PathFinder that builds confidence."""
+Write in a warm, mentoring tone as PathFinder that builds confidence.""", """
+Career: {career_title}
+Student: {student_name}
+Match reasons: {match_reasons}""")
 
-    @staticmethod
-    def get_fallback_prompt() -> str:
-        return """As PathFinder, the student seems unsure or hasn't provided enough information. Generate an encouraging response that:
+    FALLBACK = PromptTemplate("fallback", """
+The student seems unsure or hasn't provided enough information. Generate an encouraging response that:
 
 1. Acknowledges their uncertainty as normal
 2. Provides gentle encouragement
@@ -120,4 +160,162 @@ Examples of good follow-up approaches:
 - Ask about recent activities they enjoyed
 - Inquire about subjects that come naturally to them
 - Explore what kind of problems they like solving
-- Discuss their ideal day or work environment"""
+- Discuss their ideal day or work environment""", """
+Respond to the student now.""")
+
+    COMBINED_TURN = PromptTemplate("combined_turn", """
+Do two things with the student's latest message.
+
+1. Extract any new profile information from the conversation into "profile_update", using this schema:
+""" + json.dumps(PROFILE_SCHEMA, indent=2) + """
+Use null or empty arrays for anything not mentioned.
+
+2. Write your reply to the student in "reply":
+- Acknowledge what they shared with enthusiasm and show genuine interest
+- Ask ONE specific follow-up question, preferably about the topics listed as still missing
+- If you already know their name, interests and some background, suggest moving to career recommendations
+- Keep it conversational and don't repeat information they've already provided
+
+Return only a JSON object: {"profile_update": {...}, "reply": "..."}""", """
+Still missing: {missing}
+
+Known profile: {profile_summary}
+
+Recent conversation:
+{conversation}""")
+
+    CONTEXTUAL_RESPONSE = PromptTemplate("contextual_response", """
+Respond to the student's latest message.
+
+Guidelines:
+1. Acknowledge what they shared with enthusiasm
+2. Show genuine interest in their projects/experiences
+3. If they've shared substantial information about their interests, ask ONE specific follow-up question about their goals or preferences
+4. If you have enough information (name, interests, some background), suggest moving to career recommendations
+5. Keep the tone conversational and encouraging
+6. Don't ask multiple questions at once
+7. Don't repeat information they've already provided
+
+Respond naturally as PathFinder would in a real conversation.""", """
+Current student profile: {profile_summary}
+
+Student's message: "{message}\"""")
+
+    DETAILED_RESPONSE = PromptTemplate("detailed_response", """
+The student asked a question. Provide a helpful, detailed response addressing it, using their profile and any recommendations already made.""", """
+Student profile: {profile_summary}
+Available recommendations: {recommendations}
+
+Student's question: "{question}\"""")
+
+    FOLLOW_UP_QUESTIONS = PromptTemplate("follow_up_questions", """
+Generate 1-2 friendly follow-up questions to learn more about the topics you are given.
+
+Make the questions conversational and engaging.""", """
+Current profile: {profile_summary}
+
+Learn more about the student's: {missing_areas}""")
+
+    RECOMMENDATION_PRESENTATION = PromptTemplate("recommendation_presentation", """
+Present the student's top career recommendations.
+
+Guidelines:
+1. Be enthusiastic and encouraging
+2. Mention why each career matches their profile
+3. Include key details like salary and job outlook
+4. Ask if they'd like to know more about any specific career
+5. Keep it conversational and personalized
+
+Present this as a friendly career counselor would.""", """
+Student name: {student_name}
+
+Recommendations:
+{careers}""")
+
+    CONVERSATION_SUMMARY = PromptTemplate("conversation_summary", """
+You keep a running summary of a career counseling conversation with a student.
+
+Update the summary with the new messages. Keep every fact about the student (name, interests, hobbies, subjects, grades, goals, activities, preferences) and what has already been asked or recommended.
+
+Return a JSON object: {"summary": "..."}""", """
+Maximum length: {summary_words} words
+
+Current summary: {summary}
+
+New messages:
+{transcript}""")
+
+    MATCH_EXPLANATION = PromptTemplate("match_explanation", """
+Based on the student's profile and career information, explain in 1-2 sentences why the career is a match at the given percentage.
+
+Focus on specific connections between their interests/skills and the career requirements.
+Be encouraging and specific.""", """
+Match: {match_score}
+
+Student profile:
+{student_info}
+
+Career:
+{career_info}""")
+
+    BATCHED_MATCH_EXPLANATIONS = PromptTemplate("batched_match_explanations", """
+For each career you are given, explain in 1-2 sentences why it matches the student's profile.
+
+Focus on specific connections between their interests/skills and each career's requirements.
+Be encouraging and specific.
+
+Return only a JSON object mapping each career's exact title to its explanation, for example:
+{"Software Developer": "explanation"}""", """
+Student profile:
+{student_info}
+
+{careers_info}""")
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, Any]]:
+        """Render counts and average render time per template"""
+        return {template.name: template.stats() for template in vars(cls).values()
+                if isinstance(template, PromptTemplate)}
+
+    @staticmethod
+    def get_greeting_prompt() -> RenderedPrompt:
+        return PromptTemplates.GREETING.render()
+
+    @staticmethod
+    def get_interest_extraction_prompt(conversation_history: str) -> RenderedPrompt:
+        return PromptTemplates.INTEREST_EXTRACTION.render(conversation_history=conversation_history)
+
+    @staticmethod
+    def get_clarifying_questions_prompt(student_profile: StudentProfile) -> RenderedPrompt:
+        profile_summary = f"""- Name: {student_profile.name or 'Not provided'}
+- Interests: {', '.join(student_profile.interests) if student_profile.interests else 'Not provided'}
+- Hobbies: {', '.join(student_profile.hobbies) if student_profile.hobbies else 'Not provided'}
+- Preferred subjects: {', '.join(student_profile.preferred_subjects) if student_profile.preferred_subjects else 'Not provided'}
+- Academic performance: {student_profile.academic_scores if student_profile.academic_scores else 'Not provided'}
+- Career goals: {student_profile.career_goals or 'Not provided'}"""
+
+        return PromptTemplates.CLARIFYING_QUESTIONS.render(profile_summary=profile_summary)
+
+    @staticmethod
+    def get_career_matching_prompt(student_profile: StudentProfile, available_careers: List[str]) -> RenderedPrompt:
+        profile_text = f"""- Interests: {', '.join(student_profile.interests)}
+- Hobbies: {', '.join(student_profile.hobbies)}
+- Strong subjects: {', '.join(student_profile.preferred_subjects)}
+- Academic performance: {student_profile.academic_scores}
+- Career aspirations: {student_profile.career_goals}
+- Learning style: {student_profile.learning_style}
+- Activities: {', '.join(student_profile.extracurricular_activities)}
+- Work preference: {student_profile.work_environment_preference}"""
+
+        careers_list = '\n'.join([f"- {career}" for career in available_careers])
+
+        return PromptTemplates.CAREER_MATCHING.render(profile_text=profile_text, careers_list=careers_list)
+
+    @staticmethod
+    def get_career_explanation_prompt(career_title: str, student_name: str, match_reasons: str) -> RenderedPrompt:
+        return PromptTemplates.CAREER_EXPLANATION.render(career_title=career_title, student_name=student_name,
+                                                         match_reasons=match_reasons)
+
+    @staticmethod
+    def get_fallback_prompt() -> RenderedPrompt:
+        return PromptTemplates.FALLBACK.render()
@@ -0,0 +1,202 @@
+import heapq
+import itertools
+import threading
+import time
+from enum import Enum
+from typing import Dict, Any, Optional
+
+class RequestPriority(Enum):
+    INTERACTIVE = 0  # A student is waiting on this reply (chat turns)
+    BACKGROUND = 1   # Work that can yield to chat turns (e.g. career explanations)
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when a request waited too long for a rate limiter slot"""
+
+class TokenBucket:
+    """Continuously refilling budget of ``per_minute`` units"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` units are available (0 if they are now)"""
+        self._refill(now)
+        # A single request larger than the whole bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def consume(self, amount: float):
+        self.available -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Correct an earlier consume once the real cost is known (may go negative)"""
+        self.available = min(self.capacity, self.available - delta)
+
+class FairScheduler:
+    """Client-side rate limiter with per-session fair queueing
+
+    Requests are admitted against a requests/min and a tokens/min token
+    bucket. When callers have to wait, interactive requests always go first;
+    within a priority, sessions are served by start-time fair queueing on
+    their token usage, so a session that queues a large batch cannot starve
+    another session's single request. A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_wait: float = 60.0):
+        self._request_bucket = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_wait = max_wait
+
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority, virtual start time, sequence, session_id)
+        self._sequence = itertools.count()
+        self._session_vtime: Dict[str, float] = {}
+        self._global_vtime = 0.0
+
+        self._granted: Dict[str, int] = {priority.name.lower(): 0 for priority in RequestPriority}
+        self._timeouts = 0
+        self._total_wait = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self._request_bucket is not None or self._token_bucket is not None
+
+    def acquire(self, session_id: Optional[str], priority: RequestPriority, tokens: float,
+                timeout: Optional[float] = None):
+        """Block until this request may be sent
+
+        Raises RateLimitTimeout after ``timeout`` (default max_wait) seconds.
+        """
+        if not self.enabled:
+            return
+
+        session_id = session_id or "default"
+        started = time.monotonic()
+        give_up_at = started + (self.max_wait if timeout is None else min(timeout, self.max_wait))
+
+        with self._cond:
+            self._prune_sessions()
+            start_vtime = max(self._session_vtime.get(session_id, 0.0), self._global_vtime)
+            self._session_vtime[session_id] = start_vtime + max(tokens, 1.0)
+            ticket = (priority.value, start_vtime, next(self._sequence), session_id)
+            heapq.heappush(self._waiting, ticket)
+
+            while True:
+                now = time.monotonic()
+                wait = None
+                if self._waiting[0] is ticket:
+                    wait = self._reservation_wait(tokens, now)
+                    if wait == 0.0:
+                        heapq.heappop(self._waiting)
+                        self._consume(tokens)
+                        self._global_vtime = start_vtime
+                        self._granted[priority.name.lower()] += 1
+                        self._total_wait += now - started
+                        self._cond.notify_all()
+                        return
+
+                remaining = give_up_at - now
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._timeouts += 1
+                    self._cond.notify_all()
+                    raise RateLimitTimeout(f"Waited {now - started:.1f}s without getting an LLM rate limit slot")
+
+                self._cond.wait(remaining if wait is None else min(wait, remaining))
+
+    def settle(self, estimated_tokens: float, actual_tokens: Optional[float]):
+        """Charge the token bucket for the real usage of a granted request"""
+        if self._token_bucket is None or actual_tokens is None:
+            return
+        with self._cond:
+            self._token_bucket.adjust(actual_tokens - estimated_tokens)
+            self._cond.notify_all()
+
+    def _reservation_wait(self, tokens: float, now: float) -> float:
+        wait = 0.0
+        if self._request_bucket is not None:
+            wait = max(wait, self._request_bucket.wait_time(1, now))
+        if self._token_bucket is not None:
+            wait = max(wait, self._token_bucket.wait_time(tokens, now))
+        return wait
+
+    def _consume(self, tokens: float):
+        if self._request_bucket is not None:
+            self._request_bucket.consume(1)
+        if self._token_bucket is not None:
+            self._token_bucket.consume(tokens)
+
+    def _prune_sessions(self):
+        """Forget sessions that have fallen behind the global virtual time"""
+        if len(self._session_vtime) > 1000:
+            self._session_vtime = {
+                session: vtime for session, vtime in self._session_vtime.items()
+                if vtime > self._global_vtime
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            granted = sum(self._granted.values())
+            return {
+                "enabled": self.enabled,
+                "granted": dict(self._granted),
+                "queued": len(self._waiting),
+                "timeouts": self._timeouts,
+                "average_wait_seconds": self._total_wait / granted if granted else 0.0
+            }
+
+class ModelRateLimiter:
+    """A FairScheduler per model, since providers apply rate limits per model
+
+    Every model gets its own buckets with the same limits, so requests for a
+    small extraction model never queue behind a larger reply model's quota.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_wait: float = 60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait = max_wait
+        self._schedulers: Dict[str, FairScheduler] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests_per_minute > 0 or self.tokens_per_minute > 0
+
+    def scheduler(self, model: str) -> FairScheduler:
+        with self._lock:
+            scheduler = self._schedulers.get(model)
+            if scheduler is None:
+                scheduler = self._schedulers[model] = FairScheduler(
+                    self.requests_per_minute, self.tokens_per_minute, self.max_wait
+                )
+            return scheduler
+
+    def acquire(self, model: str, session_id: Optional[str], priority: RequestPriority, tokens: float,
+                timeout: Optional[float] = None):
+        if self.enabled:
+            self.scheduler(model).acquire(session_id, priority, tokens, timeout=timeout)
+
+    def settle(self, model: str, estimated_tokens: float, actual_tokens: Optional[float]):
+        if self.enabled:
+            self.scheduler(model).settle(estimated_tokens, actual_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            schedulers = dict(self._schedulers)
+        return {
+            "enabled": self.enabled,
+            "by_model": {model: scheduler.stats() for model, scheduler in schedulers.items()}
+        }
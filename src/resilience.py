@@ -0,0 +1,236 @@
+import time
+import random
+import logging
+import threading
+from enum import Enum
+from typing import Callable, Dict, Any, Optional, TypeVar
+from src.deadlines import Deadline, DeadlineExceeded, RequestCancelled
+from src.rate_limiter import RateLimitTimeout
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class ErrorKind(Enum):
+    RATE_LIMITED = "rate_limited"
+    SERVER_ERROR = "server_error"
+    TIMEOUT = "timeout"
+    CONNECTION = "connection"
+    CLIENT_ERROR = "client_error"
+    QUEUE_TIMEOUT = "queue_timeout"  # our own rate limiter; the provider was never called
+    UNKNOWN = "unknown"
+
+# Failures worth retrying; these also count against the circuit breaker
+RETRYABLE_ERRORS = {ErrorKind.RATE_LIMITED, ErrorKind.SERVER_ERROR, ErrorKind.TIMEOUT, ErrorKind.CONNECTION}
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the provider while the circuit breaker is open"""
+
+def classify_error(error: Exception) -> ErrorKind:
+    """Map a provider exception onto an ErrorKind
+
+    Classification goes by HTTP status and exception class name so it works
+    with the Groq SDK's exceptions without importing them.
+    """
+    if isinstance(error, RateLimitTimeout):
+        return ErrorKind.QUEUE_TIMEOUT
+
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        if status_code == 429:
+            return ErrorKind.RATE_LIMITED
+        if status_code in (408, 409) or status_code >= 500:
+            return ErrorKind.SERVER_ERROR
+        return ErrorKind.CLIENT_ERROR
+
+    name = type(error).__name__.lower()
+    if "timeout" in name or isinstance(error, TimeoutError):
+        return ErrorKind.TIMEOUT
+    if "connection" in name or isinstance(error, ConnectionError):
+        return ErrorKind.CONNECTION
+    return ErrorKind.UNKNOWN
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the provider's retry-after hint (retry-after-ms or retry-after header), if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    try:
+        retry_ms = headers.get("retry-after-ms")
+        if retry_ms is not None:
+            return float(retry_ms) / 1000
+        retry_s = headers.get("retry-after")
+        if retry_s is not None:
+            return float(retry_s)
+    except (TypeError, ValueError):
+        pass  # HTTP-date form or garbage; fall back to our own backoff
+    return None
+
+class CircuitBreaker:
+    """Fail fast while the provider is down
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected for ``recovery_timeout`` seconds. It then half-opens and
+    lets a single probe call through: success closes the circuit, failure
+    re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        self.times_opened = 0
+        self.rejected_calls = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if state != self.OPEN:
+                    self.times_opened += 1
+                    logger.error("Circuit breaker opened after repeated LLM failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def release_probe(self):
+        """Give back a half-open probe slot that ended without a verdict"""
+        with self._lock:
+            self._probe_in_flight = False
+
+class ResilientCaller:
+    """Run provider calls with classified retries, backoff and a circuit breaker"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 max_retry_after: float = 30.0, breaker: Optional[CircuitBreaker] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures: Dict[str, int] = {}
+
+    def call(self, fn: Callable[[], T], max_attempts: Optional[int] = None,
+             deadline: Optional[Deadline] = None) -> T:
+        """Call fn, retrying retryable errors; raises the last error or CircuitOpenError
+
+        With a ``deadline``, no attempt starts after it expires or is
+        cancelled, and a retry is skipped if its backoff would outlast it.
+        """
+        max_attempts = max(1, max_attempts or self.max_attempts)
+        with self._lock:
+            self.calls += 1
+
+        for attempt in range(1, max_attempts + 1):
+            if deadline is not None:
+                deadline.check()
+            if not self.breaker.allow_request():
+                raise CircuitOpenError("LLM provider unavailable (circuit open)")
+
+            try:
+                result = fn()
+            except (DeadlineExceeded, RequestCancelled, RateLimitTimeout):
+                # Our caller gave up, or our own rate limiter queue was full;
+                # neither says anything about the provider's health
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                kind = classify_error(e)
+                with self._lock:
+                    self.failures[kind.value] = self.failures.get(kind.value, 0) + 1
+
+                if kind not in RETRYABLE_ERRORS:
+                    # Our request was bad; the provider itself is fine
+                    self.breaker.release_probe()
+                    raise
+
+                self.breaker.record_failure()
+                delay = self._retry_delay(attempt, retry_after_seconds(e))
+                if attempt == max_attempts or delay is None or self.breaker.state == CircuitBreaker.OPEN:
+                    raise
+                if deadline is not None and deadline.cap(delay) < delay:
+                    raise
+
+                logger.warning(f"LLM call failed ({kind.value}), retrying in {delay:.2f}s: {str(e)}")
+                with self._lock:
+                    self.retries += 1
+                if deadline is not None:
+                    deadline.sleep(delay)
+                else:
+                    self._sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return result
+
+        raise RuntimeError("unreachable")
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[float]) -> Optional[float]:
+        """Exponential backoff with full jitter, never shorter than a retry-after hint
+
+        Returns None when the provider asks us to wait longer than we are
+        willing to block a user for.
+        """
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        if retry_after is None:
+            return backoff
+        if retry_after > self.max_retry_after:
+            return None
+        return max(backoff, retry_after)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures_by_kind": dict(self.failures),
+                "circuit_state": self.breaker.state,
+                "circuit_opened": self.breaker.times_opened,
+                "circuit_rejected_calls": self.breaker.rejected_calls
+            }
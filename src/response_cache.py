@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """Two-tier cache for LLM responses: an in-memory LRU in front of SQLite.
+
+    Entries are content-addressed (see ``make_key``), expire after
+    ``ttl_seconds`` and the on-disk tier is trimmed to ``max_disk_entries``
+    by least-recent use. Passing ``path=None`` keeps the cache in memory only.
+    """
+
+    # Run disk eviction every N writes rather than on every insert
+    EVICTION_INTERVAL = 50
+
+    def __init__(self, path: Optional[str] = None, max_memory_entries: int = 256,
+                 max_disk_entries: int = 5000, ttl_seconds: float = 86400):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes_since_eviction = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            self._open_disk_tier(path)
+
+    @staticmethod
+    def make_key(model: str, temperature: float, max_tokens: int,
+                 system_message: str, prompt: str, response_format: str = "text") -> str:
+        """Hash the parameters that determine a completion into a cache key"""
+        parts = [model, temperature, max_tokens, system_message, prompt]
+        if response_format != "text":
+            parts.append(response_format)
+        payload = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _open_disk_tier(self, path: str):
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache disk tier disabled: {str(e)}")
+            self._conn = None
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response, created_at = entry
+                if now - created_at < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return response
+                del self._memory[key]
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        response, created_at = row
+                        if now - created_at < self.ttl_seconds:
+                            self._conn.execute(
+                                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+                            )
+                            self._conn.commit()
+                            self._remember(key, response, created_at)
+                            self.disk_hits += 1
+                            return response
+                        self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                        self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Response cache read failed: {str(e)}")
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, response, created_at, last_access) "
+                        "VALUES (?, ?, ?, ?)", (key, response, now, now)
+                    )
+                    self._writes_since_eviction += 1
+                    if self._writes_since_eviction >= self.EVICTION_INTERVAL:
+                        self._evict_disk(now)
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Response cache write failed: {str(e)}")
+
+    def _remember(self, key: str, response: str, created_at: float):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self._memory[key] = (response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now: float):
+        """Drop expired rows, then the least recently used rows over the size limit"""
+        self._writes_since_eviction = 0
+        self._conn.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM responses")
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Response cache clear failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_enabled": self._conn is not None
+            }
@@ -0,0 +1,55 @@
+import os
+import threading
+from src.llm_client import LLMClient
+from src.career_database import CareerDatabase
+from src.career_matcher import CareerMatcher
+from src.profile_extractor import RuleBasedExtractor
+
+# Process-wide instances shared by every session (CLI run or Streamlit browser tab).
+# LLMClient, CareerDatabase, CareerMatcher and RuleBasedExtractor keep no per-student state, so one
+# copy of each is enough; per-session state lives in ConversationManager.
+_lock = threading.Lock()
+_llm_client = None
+_career_db = None
+_career_matcher = None
+_profile_extractor = None
+
+def get_llm_client() -> LLMClient:
+    """Return the shared LLM client, creating it on first use"""
+    global _llm_client
+    if _llm_client is None:
+        with _lock:
+            if _llm_client is None:
+                _llm_client = LLMClient()
+    return _llm_client
+
+def get_career_database() -> CareerDatabase:
+    """Return the shared career catalog, creating it on first use"""
+    global _career_db
+    if _career_db is None:
+        with _lock:
+            if _career_db is None:
+                _career_db = CareerDatabase()
+    return _career_db
+
+def get_career_matcher() -> CareerMatcher:
+    """Return the shared career matcher, creating it on first use"""
+    global _career_matcher
+    if _career_matcher is None:
+        llm_client = get_llm_client()
+        career_db = get_career_database()
+        with _lock:
+            if _career_matcher is None:
+                _career_matcher = CareerMatcher(career_db, llm_client)
+    return _career_matcher
+
+def get_profile_extractor() -> RuleBasedExtractor:
+    """Return the shared rule-based profile extractor, creating it on first use"""
+    global _profile_extractor
+    if _profile_extractor is None:
+        with _lock:
+            if _profile_extractor is None:
+                _profile_extractor = RuleBasedExtractor(
+                    min_confidence=float(os.getenv("FAST_EXTRACTION_CONFIDENCE", "0.8"))
+                )
+    return _profile_extractor
@@ -0,0 +1,81 @@
+import threading
+import time
+from typing import Callable, Dict, Any, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+class _InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into a single execution
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running block until it finishes and receive the same result (or
+    exception). Nothing is remembered once the call completes; pair this with
+    a cache for that.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.taken_over = 0
+
+    def do(self, key: str, fn: Callable[[], T], timeout: Optional[float] = None,
+           leader_errors: Tuple[Type[BaseException], ...] = ()) -> T:
+        """Run fn for key, or wait up to ``timeout`` seconds for the call already running
+
+        A waiting caller that receives one of ``leader_errors`` (failures
+        specific to the caller that ran fn, such as its deadline) does not
+        share it: it runs fn itself, or joins a newer call for the key.
+        """
+        expires = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is not None:
+                    self.coalesced += 1
+                    leader = False
+                else:
+                    call = _InFlightCall()
+                    self._calls[key] = call
+                    self.executed += 1
+                    leader = True
+
+            if leader:
+                break
+
+            remaining = max(0.0, expires - time.monotonic()) if expires is not None else None
+            if not call.done.wait(remaining):
+                raise TimeoutError("Timed out waiting for an identical in-flight request")
+            if call.error is None:
+                return call.result
+            if not isinstance(call.error, leader_errors):
+                raise call.error
+            with self._lock:
+                self.taken_over += 1
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "taken_over": self.taken_over,
+                "in_flight": len(self._calls)
+            }
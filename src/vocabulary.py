@@ -0,0 +1,146 @@
+from src.models import InterestCategory
+
+# Keyword vocabulary shared by CareerMatcher scoring and the rule-based profile extractor
+
+# Define comprehensive interest-to-category mappings
+INTEREST_MAPPINGS = {
+    # STEM & Technology - Enhanced mappings
+    'programming': InterestCategory.TECHNOLOGY,
+    'coding': InterestCategory.TECHNOLOGY,
+    'computer': InterestCategory.TECHNOLOGY,
+    'technology': InterestCategory.TECHNOLOGY,
+    'software': InterestCategory.TECHNOLOGY,
+    'web development': InterestCategory.TECHNOLOGY,
+    'app development': InterestCategory.TECHNOLOGY,
+    'artificial intelligence': InterestCategory.TECHNOLOGY,
+    'ai': InterestCategory.TECHNOLOGY,
+    'machine learning': InterestCategory.TECHNOLOGY,
+    'ml': InterestCategory.TECHNOLOGY,
+    'nlp': InterestCategory.TECHNOLOGY,
+    'natural language processing': InterestCategory.TECHNOLOGY,
+    'data science': InterestCategory.STEM,
+    'algorithms': InterestCategory.TECHNOLOGY,
+    'python': InterestCategory.TECHNOLOGY,
+    'javascript': InterestCategory.TECHNOLOGY,
+    'react': InterestCategory.TECHNOLOGY,
+    'streamlit': InterestCategory.TECHNOLOGY,
+    'llm': InterestCategory.TECHNOLOGY,
+    'large language models': InterestCategory.TECHNOLOGY,
+
+    'math': InterestCategory.STEM,
+    'mathematics': InterestCategory.STEM,
+    'science': InterestCategory.STEM,
+    'physics': InterestCategory.STEM,
+    'chemistry': InterestCategory.STEM,
+    'biology': InterestCategory.STEM,
+    'engineering': InterestCategory.STEM,
+    'data': InterestCategory.STEM,
+    'statistics': InterestCategory.STEM,
+    'analytics': InterestCategory.STEM,
+
+    # Arts & Creative - Enhanced mappings
+    'art': InterestCategory.ARTS,
+    'arts': InterestCategory.ARTS,
+    'creative': InterestCategory.ARTS,
+    'creativity': InterestCategory.ARTS,
+    'drawing': InterestCategory.ARTS,
+    'painting': InterestCategory.ARTS,
+    'music': InterestCategory.ARTS,
+    'singing': InterestCategory.ARTS,
+    'design': InterestCategory.ARTS,
+    'graphic design': InterestCategory.ARTS,
+    'visual design': InterestCategory.ARTS,
+    'photography': InterestCategory.ARTS,
+    'writing': InterestCategory.ARTS,
+    'creative writing': InterestCategory.ARTS,
+    'literature': InterestCategory.ARTS,
+    'drama': InterestCategory.ARTS,
+    'theater': InterestCategory.ARTS,
+    'theatre': InterestCategory.ARTS,
+    'film': InterestCategory.ARTS,
+    'video': InterestCategory.ARTS,
+    'animation': InterestCategory.ARTS,
+    'illustration': InterestCategory.ARTS,
+    'digital art': InterestCategory.ARTS,
+    'fine arts': InterestCategory.ARTS,
+    'visual arts': InterestCategory.ARTS,
+    'english': InterestCategory.ARTS,  # English often relates to creative writing
+
+    # Healthcare
+    'health': InterestCategory.HEALTHCARE,
+    'medicine': InterestCategory.HEALTHCARE,
+    'medical': InterestCategory.HEALTHCARE,
+    'helping people': InterestCategory.HEALTHCARE,
+    'care': InterestCategory.HEALTHCARE,
+    'nursing': InterestCategory.HEALTHCARE,
+    'doctor': InterestCategory.HEALTHCARE,
+    'physician': InterestCategory.HEALTHCARE,
+    'patient care': InterestCategory.HEALTHCARE,
+    'human health': InterestCategory.HEALTHCARE,
+    'medical care': InterestCategory.HEALTHCARE,
+
+    # Business & Finance
+    'business': InterestCategory.BUSINESS,
+    'finance': InterestCategory.BUSINESS,
+    'money': InterestCategory.BUSINESS,
+    'economics': InterestCategory.BUSINESS,
+    'marketing': InterestCategory.BUSINESS,
+    'sales': InterestCategory.BUSINESS,
+    'management': InterestCategory.BUSINESS,
+    'entrepreneurship': InterestCategory.BUSINESS,
+    'startup': InterestCategory.BUSINESS,
+
+    # Education
+    'teaching': InterestCategory.EDUCATION,
+    'education': InterestCategory.EDUCATION,
+    'tutoring': InterestCategory.EDUCATION,
+    'mentoring': InterestCategory.EDUCATION,
+
+    # Sports & Recreation
+    'sports': InterestCategory.SPORTS,
+    'athletics': InterestCategory.SPORTS,
+    'fitness': InterestCategory.SPORTS,
+    'exercise': InterestCategory.SPORTS,
+    'physical': InterestCategory.SPORTS,
+
+    # Social Services
+    'social work': InterestCategory.SOCIAL_SERVICES,
+    'community': InterestCategory.SOCIAL_SERVICES,
+    'volunteering': InterestCategory.SOCIAL_SERVICES,
+    'counseling': InterestCategory.SOCIAL_SERVICES,
+
+    # Law
+    'law': InterestCategory.LAW,
+    'legal': InterestCategory.LAW,
+    'justice': InterestCategory.LAW,
+    'debate': InterestCategory.LAW,
+
+    # Environment
+    'environment': InterestCategory.ENVIRONMENT,
+    'nature': InterestCategory.ENVIRONMENT,
+    'outdoors': InterestCategory.ENVIRONMENT,
+    'sustainability': InterestCategory.ENVIRONMENT,
+}
+
+# Technology-specific keywords for enhanced matching
+TECH_KEYWORDS = [
+    'coding', 'programming', 'software', 'ai', 'artificial intelligence',
+    'machine learning', 'nlp', 'natural language processing', 'data science',
+    'web development', 'app development', 'python', 'javascript', 'react',
+    'streamlit', 'llm', 'algorithms', 'computer science', 'technology'
+]
+
+# Creative/Arts keywords for enhanced matching
+CREATIVE_KEYWORDS = [
+    'art', 'arts', 'creative', 'creativity', 'design', 'drawing', 'painting',
+    'music', 'writing', 'literature', 'photography', 'visual', 'graphic',
+    'illustration', 'animation', 'film', 'video', 'theater', 'drama'
+]
+
+# School subjects recognised by the rule-based profile extractor
+SUBJECTS = [
+    'computer science', 'mathematics', 'math', 'maths', 'algebra', 'calculus', 'geometry',
+    'statistics', 'physics', 'chemistry', 'biology', 'science', 'english', 'literature',
+    'history', 'geography', 'economics', 'psychology', 'sociology', 'art', 'music',
+    'french', 'spanish', 'german', 'physical education'
+]
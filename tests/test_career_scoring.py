@@ -0,0 +1,172 @@
+import random
+
+import pytest
+
+from src.career_database import CareerDatabase
+from src.career_matcher import CareerMatcher
+from src.models import InterestCategory, StudentProfile
+from src.vocabulary import CREATIVE_KEYWORDS, INTEREST_MAPPINGS, TECH_KEYWORDS
+
+# The per-career scoring the precomputed CareerFeatures/ProfileFeatures replaced,
+# kept as the reference behaviour
+
+SUBJECT_CAREER_MAPPINGS = {
+    'computer science': ['Software Engineer', 'Data Scientist', 'AI/Machine Learning Engineer', 'Web Developer'],
+    'mathematics': ['Data Scientist', 'Financial Analyst', 'Research Scientist', 'AI/Machine Learning Engineer'],
+    'art': ['UX/UI Designer', 'Graphic Designer', 'Digital Artist', 'Content Creator'],
+    'biology': ['Medical Doctor', 'Medical Researcher', 'Health Informatics Specialist'],
+    'business': ['Product Manager', 'Financial Analyst', 'Business Analyst', 'Digital Marketing Specialist'],
+    'english': ['Content Creator', 'Digital Marketing Specialist', 'Teacher'],
+    'physics': ['Research Scientist', 'Data Scientist', 'Software Engineer'],
+    'chemistry': ['Medical Researcher', 'Research Scientist', 'Medical Doctor']
+}
+
+def reference_career_keywords(career):
+    keywords = career.title.lower().split()
+    if career.category == InterestCategory.TECHNOLOGY:
+        keywords.extend(TECH_KEYWORDS)
+    elif career.category == InterestCategory.ARTS:
+        keywords.extend(CREATIVE_KEYWORDS)
+    keywords.extend(skill.lower() for skill in career.required_skills)
+    return set(keywords)
+
+def reference_interest_category(interest):
+    interest_lower = interest.lower()
+    for keyword, category in INTEREST_MAPPINGS.items():
+        if keyword in interest_lower:
+            return category
+    return None
+
+def reference_interest_match(profile, career):
+    all_interests = profile.interests + profile.hobbies
+    if not all_interests:
+        return 0.0
+    career_keywords = reference_career_keywords(career)
+    match_score = 0.0
+    for interest in all_interests:
+        interest_lower = interest.lower()
+        if any(keyword in interest_lower for keyword in career_keywords):
+            match_score += 1.0
+        elif reference_interest_category(interest) == career.category:
+            match_score += 0.8
+        elif any(skill.lower() in interest_lower or interest_lower in skill.lower() for skill in career.required_skills):
+            match_score += 0.6
+        elif any(word in interest_lower for word in career.title.lower().split()):
+            match_score += 0.4
+    return min(match_score / len(all_interests), 1.0)
+
+def reference_academic_match(profile, career):
+    if not profile.preferred_subjects:
+        return 0.5
+    match_score = 0.0
+    for subject in profile.preferred_subjects:
+        subject_lower = subject.lower()
+        if career.title in SUBJECT_CAREER_MAPPINGS.get(subject_lower, []):
+            match_score += 1.0
+        elif any(word in subject_lower for word in career.title.lower().split()):
+            match_score += 0.6
+        elif (subject_lower in ['math', 'mathematics', 'science', 'physics', 'chemistry'] and
+              career.category in [InterestCategory.STEM, InterestCategory.TECHNOLOGY]):
+            match_score += 0.5
+    return min(match_score / len(profile.preferred_subjects), 1.0)
+
+def reference_skills_match(profile, career):
+    all_activities = profile.extracurricular_activities + profile.interests + profile.hobbies
+    if not all_activities:
+        return 0.5
+    match_score = 0.0
+    skill_matches = 0
+    for activity in all_activities:
+        activity_lower = activity.lower()
+        for skill in career.required_skills:
+            skill_lower = skill.lower()
+            if (skill_lower in activity_lower or activity_lower in skill_lower or
+                    any(word in activity_lower for word in skill_lower.split())):
+                match_score += 1.0
+                skill_matches += 1
+                break
+    if skill_matches >= 3:
+        match_score *= 1.2
+    elif skill_matches >= 2:
+        match_score *= 1.1
+    return min(match_score / len(career.required_skills), 1.0)
+
+def reference_goals_match(profile, career):
+    if not profile.career_goals:
+        return 0.5
+    career_text = (career.title + " " + career.description).lower()
+    common_words = set(profile.career_goals.lower().split()) & set(career_text.split())
+    if len(common_words) >= 3:
+        return 0.9
+    if len(common_words) >= 2:
+        return 0.7
+    if len(common_words) >= 1:
+        return 0.5
+    return 0.3
+
+def reference_match_score(profile, career):
+    score = 0.0
+    total_weight = 0.0
+    for component, weight in ((reference_interest_match, 0.4), (reference_academic_match, 0.25),
+                              (reference_skills_match, 0.2), (reference_goals_match, 0.15)):
+        score += component(profile, career) * weight
+        total_weight += weight
+    return min(score / total_weight, 1.0)
+
+def reference_matched_keywords(profile, career):
+    career_keywords = reference_career_keywords(career)
+    matched_interests, matched_skills = [], []
+    for item in profile.interests + profile.hobbies + profile.extracurricular_activities:
+        item_lower = item.lower()
+        if item not in matched_interests and any(keyword in item_lower for keyword in career_keywords):
+            matched_interests.append(item)
+        for skill in career.required_skills:
+            skill_lower = skill.lower()
+            if skill not in matched_skills and (skill_lower in item_lower or item_lower in skill_lower):
+                matched_skills.append(skill)
+    return matched_interests, matched_skills
+
+VOCABULARY = (list(INTEREST_MAPPINGS) + list(TECH_KEYWORDS) + list(CREATIVE_KEYWORDS) +
+              ["problem-solving", "statistics", "Design", "python programming", "helping others", "teacher",
+               "data", "build games for kids", "research", "engineer"])
+GOALS = [None, "", "I want to build software and analyze data for companies", "help patients in a hospital",
+         "design games"]
+
+def random_profile(rng):
+    def pick(most=3):
+        return [rng.choice(VOCABULARY) if rng.random() < 0.8 else rng.choice(VOCABULARY).title()
+                for _ in range(rng.randint(0, most))]
+    return StudentProfile(
+        interests=pick(), hobbies=pick(),
+        preferred_subjects=pick(2) + rng.sample(["math", "art", "biology", "physics", "english", "computer science"], 1),
+        extracurricular_activities=pick(2), career_goals=rng.choice(GOALS)
+    )
+
+@pytest.fixture(scope="module")
+def matcher():
+    return CareerMatcher(CareerDatabase(), None)
+
+def test_component_scores_match_reference(matcher):
+    rng = random.Random(7)
+    careers = matcher.career_db.get_all_careers()
+    for _ in range(200):
+        profile = random_profile(rng)
+        for career in careers:
+            assert matcher._calculate_interest_match(profile, career) == reference_interest_match(profile, career)
+            assert matcher._calculate_academic_match(profile, career) == reference_academic_match(profile, career)
+            assert matcher._calculate_skills_match(profile, career) == reference_skills_match(profile, career)
+            assert matcher._calculate_goals_match(profile, career) == reference_goals_match(profile, career)
+            assert matcher._calculate_match_score(profile, career) == reference_match_score(profile, career)
+            assert matcher._matched_keywords(profile, career) == reference_matched_keywords(profile, career)
+
+def test_ranking_matches_reference(matcher):
+    rng = random.Random(11)
+    careers = matcher.career_db.get_all_careers()
+    for _ in range(200):
+        profile = random_profile(rng)
+        primary_categories = matcher._get_primary_categories(profile)
+        scored = [(career, reference_match_score(profile, career)) for career in careers]
+        ranked = sorted(scored, key=lambda item: item[1], reverse=True)
+        expected = [career.title for career, score in ranked
+                    if matcher._should_include_career(profile, career, score, primary_categories)][:8]
+        assert [career.title for career in matcher.find_matching_careers(profile, explain_top_k=0)] == expected
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from src.career_database import CareerDatabase
+from src.career_matcher import CareerMatcher
+from src.keyword_automaton import KeywordAutomaton
+from src.models import InterestCategory, StudentProfile
+from src.vocabulary import CREATIVE_KEYWORDS, INTEREST_MAPPINGS, TECH_KEYWORDS
+
+# The substring scans the automaton replaced, kept as the reference behaviour
+
+def reference_interest_category(interest):
+    interest_lower = interest.lower()
+    for keyword, category in INTEREST_MAPPINGS.items():
+        if keyword in interest_lower:
+            return category
+    return None
+
+def reference_primary_categories(student_profile):
+    category_scores = {}
+    for interest in student_profile.interests + student_profile.hobbies + student_profile.preferred_subjects:
+        interest_lower = interest.lower()
+        for keyword, category in INTEREST_MAPPINGS.items():
+            if keyword in interest_lower:
+                category_scores[category] = category_scores.get(category, 0) + 1
+        if any(tech_word in interest_lower for tech_word in TECH_KEYWORDS):
+            category_scores[InterestCategory.TECHNOLOGY] = category_scores.get(InterestCategory.TECHNOLOGY, 0) + 2
+            category_scores[InterestCategory.STEM] = category_scores.get(InterestCategory.STEM, 0) + 1
+        if any(creative_word in interest_lower for creative_word in CREATIVE_KEYWORDS):
+            category_scores[InterestCategory.ARTS] = category_scores.get(InterestCategory.ARTS, 0) + 2
+    ranked = sorted(category_scores.items(), key=lambda item: item[1], reverse=True)
+    return [category for category, score in ranked if score > 0][:3]
+
+VOCABULARY = (list(INTEREST_MAPPINGS) + list(TECH_KEYWORDS) + list(CREATIVE_KEYWORDS) +
+              ["the", "xyz", "helping", "art ", "I love", "!"])
+
+def random_interest(rng):
+    interest = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(1, 3)))
+    if rng.random() < 0.3:
+        interest = interest.title()
+    if rng.random() < 0.3:
+        interest = interest.replace(" ", "")
+    return interest
+
+@pytest.fixture(scope="module")
+def matcher():
+    return CareerMatcher(CareerDatabase(), None)
+
+def test_find_matches_substring_containment():
+    # Overlapping keywords, a duplicate and the empty keyword
+    keywords = ["a", "ab", "bab", "bc", "bca", "c", "caa", "", "ab"]
+    automaton = KeywordAutomaton(keywords)
+    rng = random.Random(0)
+    for _ in range(3000):
+        text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 12)))
+        assert automaton.find(text) == {index for index, keyword in enumerate(keywords) if keyword in text}, text
+
+def test_interest_category_matches_substring_scan(matcher):
+    rng = random.Random(1)
+    for _ in range(3000):
+        interest = random_interest(rng)
+        assert matcher._get_interest_category(interest) == reference_interest_category(interest), interest
+
+def test_primary_categories_match_substring_scan(matcher):
+    rng = random.Random(2)
+    for _ in range(1000):
+        profile = StudentProfile(
+            interests=[random_interest(rng) for _ in range(rng.randint(0, 3))],
+            hobbies=[random_interest(rng) for _ in range(rng.randint(0, 2))],
+            preferred_subjects=[random_interest(rng) for _ in range(rng.randint(0, 2))]
+        )
+        assert matcher._get_primary_categories(profile) == reference_primary_categories(profile), profile